@@ -1,8 +1,168 @@
 import streamlit as st
 import pandas as pd
-from scraper import scrape_all_pages, verify_login
+from scraper import create_job, iter_scrape_job, scrape_new_results, verify_login
+from detail_crawler import crawl_company_details, record_links
+from page_cache import PageCache
+from scrape_journal import ScrapeJournal
+from columnar import ColumnarBuilder, concat_long, frame_to_long, long_to_wide, records_to_long
+from results_parser import result_column_order
+from rate_limit import AdaptiveRateController
+from filters import ScreenIndex, filter_positions
+from export import EXPORT_FORMATS, cached_export, fingerprint
+from metrics import PHASE_LABELS, JsonLinesSink, PrometheusSink
+from company_parser import DETAIL_TABLES
 import time
 import os
+import uuid
+
+# Quarter columns (Sales_Dec25, ...) are named after the page header, so they get their config in column_config()
+COLUMN_CONFIG = {
+    "Company": st.column_config.TextColumn("Company", width="medium"),
+    "Quarter": st.column_config.TextColumn("Result"),
+    "Price": st.column_config.NumberColumn("Price (₹)", format="%.2f"),
+    "Market_Cap": st.column_config.NumberColumn("M.Cap (Cr)", format="%.2f"),
+    "PE": st.column_config.NumberColumn("P/E", format="%.1f"),
+    "Sales_YOY": st.column_config.NumberColumn("Sales YOY%", format="%.1f"),
+    "EBIDT_YOY": st.column_config.NumberColumn("EBIDT YOY%", format="%.1f"),
+    "NetProfit_YOY": st.column_config.NumberColumn("Profit YOY%", format="%.1f"),
+    "EPS_YOY": st.column_config.NumberColumn("EPS YOY%", format="%.1f"),
+    "Link": None,  # Company page path, kept for the detail crawl
+}
+
+DETAIL_LABELS = {
+    'quarters': "Quarterly history",
+    'balance_sheet': "Balance sheet",
+    'ratios': "Ratios",
+}
+
+def column_config(columns):
+    """COLUMN_CONFIG plus a fixed format for the quarter columns (float32 values would show float noise)"""
+    return {col: COLUMN_CONFIG[col] if col in COLUMN_CONFIG else st.column_config.NumberColumn(format="%.2f") for col in columns}
+
+# (column, widget key prefix, default range); None means "no limit until the widget is shown"
+RANGE_FILTERS = [
+    ('Price', 'screener_price', (None, None)),
+    ('Market_Cap', 'screener_mcap', (None, None)),
+    ('Sales_YOY', 'screener_sales', (-100.0, 500.0)),
+    ('EBIDT_YOY', 'screener_ebidt', (-100.0, 500.0)),
+    ('NetProfit_YOY', 'screener_profit', (-100.0, 500.0)),
+    ('EPS_YOY', 'screener_eps', (-100.0, 500.0)),
+]
+
+def apply_filters(df, company_search, ranges):
+    """Filter by company name and {column: (min, max)} ranges; rows missing a value are kept"""
+    return df.iloc[filter_positions(df, company_search, ranges)]
+
+@st.cache_resource(show_spinner=False)
+def get_journal():
+    """One journal connection per process (ScrapeJournal serializes access itself), reused across reruns"""
+    return ScrapeJournal()
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def screen_index(_df, data_version):
+    """Sorted indexes over the range-filter columns, built once per dataset version"""
+    return ScreenIndex(_df, [column for column, _, _ in RANGE_FILTERS])
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_filter_positions(_df, data_version, company_search, ranges):
+    """
+    Row positions for a filter setting, memoized per dataset version
+
+    The frame itself is not hashed (leading underscore); data_version stands in
+    for it. ranges is a tuple of (column, (min, max)) so it can be hashed.
+    """
+    return screen_index(_df, data_version).positions(company_search, dict(ranges))
+
+def use_suggestion():
+    """Copy the picked autocomplete suggestion into the company search box"""
+    picked = st.session_state.get('screener_company_suggestion')
+    if picked:
+        st.session_state.screener_company_search = picked
+    st.session_state.screener_company_suggestion = None
+
+def set_screener_data(long_df, links=None):
+    """
+    Store a new dataset in long layout, with the wide view the screen works on
+
+    The pivot is computed once here; the fresh version id invalidates cached
+    filter results. links ((company, href) pairs, see detail_crawler.record_links)
+    are the company pages the detail crawl fetches.
+    """
+    st.session_state.screener_long = long_df
+    st.session_state.screener_links = links or []
+    st.session_state.screener_data = long_to_wide(long_df) if long_df is not None else None
+    st.session_state.screener_data_version = uuid.uuid4().hex
+
+# Metrics export choice -> sink factory
+METRICS_EXPORTS = {
+    "Off": None,
+    "JSON lines (screener_metrics.jsonl)": JsonLinesSink,
+    "Prometheus file (screener_metrics.prom)": PrometheusSink,
+}
+
+def show_run_stats(run_stats):
+    """Time per page phase and per-worker counters of the last scrape"""
+    with st.expander("📊 Run stats"):
+        workers = run_stats.get('workers', {})
+        pages = sum(stats['pages'] for stats in workers.values())
+        st.caption(
+            f"{pages} pages in {run_stats['elapsed']:.1f}s with {len(workers)} worker(s), "
+            f"{len(run_stats.get('failed_pages', {}))} failed"
+        )
+        phases = run_stats.get('phases', {})
+        total = sum(stats['total'] for stats in phases.values()) or 1.0
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    'Phase': PHASE_LABELS.get(phase, phase),
+                    'Total (s)': stats['total'],
+                    'Share': stats['total'] / total * 100,
+                    'Count': stats['count'],
+                    'Mean (ms)': stats['mean'] * 1000,
+                    'p95 (ms)': stats['p95'] * 1000,
+                }
+                for phase, stats in sorted(phases.items(), key=lambda item: -item[1]['total'])
+            ]),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'Total (s)': st.column_config.NumberColumn(format="%.2f"),
+                'Share': st.column_config.ProgressColumn(format="%.0f%%", min_value=0, max_value=100),
+                'Mean (ms)': st.column_config.NumberColumn(format="%.1f"),
+                'p95 (ms)': st.column_config.NumberColumn(format="%.1f"),
+            }
+        )
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    'Worker': worker_id,
+                    'Pages': stats['pages'],
+                    'Pages/s': stats.get('pages_per_sec', 0.0),
+                    'Errors': stats['failures'],
+                    'Retries': stats.get('retries', 0),
+                    'KB/page': stats.get('bytes', 0) / 1024 / stats['pages'] if stats['pages'] else 0.0,
+                    'Busy': stats['utilisation'] * 100,
+                }
+                for worker_id, stats in sorted(workers.items())
+            ]),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'Pages/s': st.column_config.NumberColumn(format="%.2f"),
+                'KB/page': st.column_config.NumberColumn(format="%.0f", help="Transferred by the browser (Headless Chrome only)"),
+                'Busy': st.column_config.NumberColumn(format="%.0f%%"),
+            }
+        )
+
+def filters_from_state():
+    """Filter settings last entered in the filter widgets, for filtering data before they are shown"""
+    ranges = {}
+    for column, key, (default_min, default_max) in RANGE_FILTERS:
+        low = st.session_state.get(f'{key}_min', default_min)
+        high = st.session_state.get(f'{key}_max', default_max)
+        if low is not None and high is not None:
+            ranges[column] = (low, high)
+    return st.session_state.get('screener_company_search', ''), ranges
 
 def show_quarterly_screener():
     """Main function to show the quarterly results screener"""
@@ -13,7 +173,9 @@ def show_quarterly_screener():
     
     # Initialize session state
     if 'screener_data' not in st.session_state:
-        st.session_state.screener_data = None
+        set_screener_data(None)
+    if 'screener_data_version' not in st.session_state:
+        st.session_state.screener_data_version = uuid.uuid4().hex
     if 'screener_login_verified' not in st.session_state:
         st.session_state.screener_login_verified = False
     
@@ -41,7 +203,8 @@ def show_quarterly_screener():
     # Verify login
     if not st.session_state.screener_login_verified:
         with st.spinner("🔐 Verifying Screener.in login..."):
-            if verify_login():
+            # The scrape runs on lean drivers unless that is turned off under Advanced
+            if verify_login(lean_browser=st.session_state.get('screener_lean_browser', True)):
                 st.success("✅ Login verified! Ready to scrape.")
                 st.session_state.screener_login_verified = True
                 time.sleep(1)
@@ -72,8 +235,9 @@ def show_quarterly_screener():
     with col1:
         fetch_mode = st.radio(
             "Fetch Mode",
-            ["All Pages (1-80)", "Custom Pages"],
+            ["All Pages", "New Results Only", "Custom Pages"],
             horizontal=True,
+            help="All Pages reads the page count from page 1. New Results Only walks the newest pages and stops at the first page with nothing new",
             key="screener_fetch_mode"
         )
     
@@ -96,6 +260,22 @@ def show_quarterly_screener():
     
     # Performance settings
     st.subheader("⚙️ Performance Settings")
+    fetch_engine = st.radio(
+        "🌐 Fetch Engine",
+        ["HTTP (fast, no browser)", "Headless Chrome"],
+        horizontal=True,
+        help="HTTP fetches the server-rendered pages directly with the saved cookies. Use Chrome if HTTP fetches come back empty.",
+        key="screener_fetch_engine"
+    )
+    backend = 'http' if fetch_engine.startswith("HTTP") else 'selenium'
+    
+    auto_rate = st.checkbox(
+        "⚖️ Auto-tune speed",
+        value=False,
+        help="Start cautiously and speed up while responses stay healthy; slow down on empty pages, login redirects, HTTP 429/5xx or slow responses. The tuned speed is remembered between runs.",
+        key="screener_auto_rate"
+    )
+    
     col_perf1, col_perf2 = st.columns(2)
     
     with col_perf1:
@@ -104,10 +284,10 @@ def show_quarterly_screener():
             min_value=1,
             max_value=3,
             value=1,
-            help="Limited to 3 workers on Streamlit Cloud. Use 1-2 for stability.",
+            help="Limited to 3 workers on Streamlit Cloud. Use 1-2 for stability. With auto-tune this is the upper limit.",
             key="screener_workers"
         )
-        if num_workers > 1:
+        if num_workers > 1 and not auto_rate:
             st.caption(f"⚡ {num_workers}x faster with {num_workers} parallel workers")
     
     with col_perf2:
@@ -117,59 +297,211 @@ def show_quarterly_screener():
             max_value=10,
             value=5,
             help="Recommended: 5-8s for Streamlit Cloud stability",
+            disabled=auto_rate,
             key="screener_delay"
         )
     
+    col_cache1, col_cache2, col_cache3 = st.columns([1, 1, 1])
+    with col_cache1:
+        use_cache = st.checkbox(
+            "💾 Use page cache",
+            value=True,
+            help="Reuse pages fetched recently instead of downloading them again",
+            key="screener_use_cache"
+        )
+    with col_cache2:
+        cache_ttl_min = st.number_input(
+            "Cache lifetime (minutes)",
+            min_value=1,
+            max_value=1440,
+            value=15,
+            disabled=not use_cache,
+            key="screener_cache_ttl"
+        )
+    with col_cache3:
+        if st.button("🗑️ Clear cache", key="screener_clear_cache"):
+            PageCache().clear()
+            st.success("Page cache cleared")
+    
+    with st.expander("🔧 Advanced"):
+        parse_processes = st.slider(
+            "🧩 Parser processes",
+            min_value=0,
+            max_value=max(1, min(4, os.cpu_count() or 1)),
+            value=0,
+            help="0 parses in the fetch workers. More than 0 moves parsing to separate processes so fetching isn't slowed by it.",
+            key="screener_parse_processes"
+        )
+        lean_browser = st.checkbox(
+            "🪶 Lean browser",
+            value=True,
+            disabled=backend != 'selenium',
+            help="Headless Chrome only: skip images, stylesheets, fonts, analytics and ads, and read the page as soon as its HTML is parsed. Less data and memory per page.",
+            key="screener_lean_browser"
+        )
+        dom_extract = st.checkbox(
+            "⚡ Extract in browser",
+            value=True,
+            disabled=backend != 'selenium',
+            help="Headless Chrome only: read the results straight from the page with one script call instead of copying the whole page source back and parsing it",
+            key="screener_dom_extract"
+        )
+        metrics_export = st.selectbox(
+            "📈 Export run metrics",
+            list(METRICS_EXPORTS),
+            help="Also write every page's timings to a file: JSON lines (one span per line) or the Prometheus text format",
+            key="screener_metrics_export"
+        )
+    
+    # Offer to finish the last job if it was interrupted or had failed pages
+    journal = get_journal()
+    resume_job_id = journal.latest_job(incomplete_only=True)
+    resume_clicked = False
+    if resume_job_id:
+        summary = journal.job_summary(resume_job_id)
+        col_resume1, col_resume2 = st.columns([3, 1])
+        with col_resume1:
+            st.warning(
+                f"📒 Last scrape is incomplete: {summary['done']}/{summary['total']} pages done, "
+                f"{summary['failed']} failed, {summary['pending']} not fetched"
+            )
+            if summary['failures']:
+                with st.expander("Failure reasons"):
+                    for page_num, (attempts, error) in sorted(summary['failures'].items()):
+                        st.caption(f"Page {page_num}: {attempts} attempt(s), {error}")
+        with col_resume2:
+            resume_clicked = st.button("▶️ Resume", use_container_width=True, key="screener_resume")
+    
     # Fetch button
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button("🔄 Fetch Quarterly Results", type="primary", use_container_width=True, key="screener_fetch"):
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Parse pages
-            if fetch_mode == "All Pages (1-80)":
-                pages_to_fetch = list(range(1, 81))
-            else:
-                try:
-                    pages_to_fetch = []
-                    parts = page_input.replace(' ', '').split(',')
-                    for part in parts:
-                        if '-' in part:
-                            start, end = map(int, part.split('-'))
-                            pages_to_fetch.extend(range(start, end + 1))
-                        else:
-                            pages_to_fetch.append(int(part))
-                    pages_to_fetch = sorted(list(set(pages_to_fetch)))
-                except:
-                    st.error("Invalid page format! Use: 1,5,10-15,20")
-                    return
-            
-            def update_progress(current_idx, total):
-                progress = current_idx / total
-                progress_bar.progress(progress)
-                status_text.text(f"Scraping page {current_idx}/{total}...")
-            
+        fetch_clicked = st.button("🔄 Fetch Quarterly Results", type="primary", use_container_width=True, key="screener_fetch")
+    
+    if fetch_clicked or resume_clicked:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        # Parse pages (None: every page, planned from page 1's pagination)
+        new_only = fetch_mode == "New Results Only" and not resume_clicked
+        pages_to_fetch = None
+        if resume_clicked:
+            pages_to_fetch = journal.pending_pages(resume_job_id)
+        elif fetch_mode == "Custom Pages":
             try:
-                with st.spinner("Fetching data from Screener.in..."):
-                    df = scrape_all_pages(
-                        pages_list=pages_to_fetch, 
+                pages_to_fetch = []
+                parts = page_input.replace(' ', '').split(',')
+                for part in parts:
+                    if '-' in part:
+                        start, end = map(int, part.split('-'))
+                        pages_to_fetch.extend(range(start, end + 1))
+                    else:
+                        pages_to_fetch.append(int(part))
+                pages_to_fetch = sorted(list(set(pages_to_fetch)))
+            except:
+                st.error("Invalid page format! Use: 1,5,10-15,20")
+                return
+        
+        def update_progress(current_idx, total):
+            progress = current_idx / total
+            progress_bar.progress(progress)
+            status_text.text(f"Scraping page {current_idx}/{total}...")
+        
+        try:
+            if new_only:
+                with st.spinner("Fetching new results from Screener.in..."):
+                    df, new_df = scrape_new_results(
+                        existing_df=st.session_state.screener_data,
                         progress_callback=update_progress,
-                        num_workers=num_workers,
-                        delay=delay
+                        delay=delay,
+                        backend=backend,
+                        lean_browser=lean_browser,
+                        dom_extract=dom_extract
                     )
-                    st.session_state.screener_data = df
+                    # New results go first so they win over older values for the same quarter
+                    history = st.session_state.get('screener_long')
+                    if history is not None and len(history) > 0:
+                        links = list(dict.fromkeys(record_links(new_df.to_dict('records')) + st.session_state.get('screener_links', [])))
+                        set_screener_data(concat_long([frame_to_long(new_df), history]), links)
+                    else:
+                        set_screener_data(frame_to_long(df), record_links(df.to_dict('records')))
                     progress_bar.progress(1.0)
-                    status_text.text(f"✅ Successfully fetched {len(df)} companies from {len(pages_to_fetch)} pages!")
+                    status_text.text(f"✅ {len(new_df)} new results, {len(st.session_state.screener_data)} companies in total")
                     time.sleep(1)
                     st.rerun()
-            except Exception as e:
-                st.error(f"Error fetching data: {e}")
-                st.info("Try reducing workers to 1 or increasing delay")
+            
+            with st.spinner("Fetching data from Screener.in..."):
+                scrape_options = {
+                    'num_workers': num_workers,
+                    'delay': delay,
+                    'backend': backend,
+                    'parse_processes': parse_processes,
+                    'lean_browser': lean_browser,
+                    'dom_extract': dom_extract,
+                }
+                if resume_clicked:
+                    job_id = resume_job_id
+                    scrape_options.update(journal.job_options(job_id))
+                else:
+                    job_id = create_job(journal, pages_to_fetch, **scrape_options)
+                
+                # Show rows as pages arrive, filtered with the last-used filter settings
+                live_caption = st.empty()
+                live_table = st.empty()
+                company_search, ranges = filters_from_state()
+                run_stats = {}
+                make_sink = METRICS_EXPORTS[metrics_export]
+                received = ColumnarBuilder()
+                received.extend(journal.job_records(job_id))
+                
+                for page_num, companies in iter_scrape_job(
+                    journal,
+                    job_id,
+                    pages_to_fetch,
+                    progress_callback=update_progress,
+                    cache=PageCache(ttl=cache_ttl_min * 60) if use_cache else None,
+                    rate_controller=AdaptiveRateController(max_concurrency=num_workers) if auto_rate else None,
+                    run_stats=run_stats,
+                    metrics_sinks=[make_sink()] if make_sink else (),
+                    **scrape_options
+                ):
+                    if not companies:
+                        continue
+                    received.extend(companies)
+                    partial_df = apply_filters(received.to_frame(), company_search, ranges)
+                    live_caption.caption(f"📡 {len(received)} results so far, {len(partial_df)} match the current filters")
+                    live_table.dataframe(
+                        partial_df[result_column_order(partial_df.columns)],
+                        use_container_width=True,
+                        height=400,
+                        column_config=column_config(partial_df.columns)
+                    )
+                
+                # Includes pages committed before a resume, in page order
+                records = journal.job_records(job_id)
+                set_screener_data(records_to_long(records), record_links(records))
+                st.session_state.screener_run_stats = run_stats
+                if run_stats.get('login_expired'):
+                    # Back to the cookie upload; the job can be resumed afterwards
+                    st.session_state.screener_login_verified = False
+                    st.error("🔑 Login expired during the scrape. Upload fresh cookies, then resume.")
+                    return
+                df = st.session_state.screener_data
+                pages_done = journal.job_summary(job_id)['done']
+                progress_bar.progress(1.0)
+                # A company listed on more than one page is scraped more than once but shown once
+                status_text.text(f"✅ Successfully fetched {len(records)} results ({len(df)} unique companies) from {pages_done} pages!")
+                time.sleep(1)
+                st.rerun()
+        except Exception as e:
+            st.error(f"Error fetching data: {e}")
+            st.info("Try reducing workers to 1 or increasing delay")
+
+    if st.session_state.get('screener_run_stats'):
+        show_run_stats(st.session_state.screener_run_stats)
     
     # Display data
     if st.session_state.screener_data is not None and len(st.session_state.screener_data) > 0:
-        df = st.session_state.screener_data.copy()
+        df = st.session_state.screener_data
         
         if 'Price' not in df.columns or len(df) == 0:
             st.error("No data fetched. Please try again with different pages.")
@@ -182,6 +514,15 @@ def show_quarterly_screener():
         
         with col1:
             company_search = st.text_input("🏢 Company Name", placeholder="Search...", key="screener_company_search")
+            names = screen_index(df, st.session_state.screener_data_version).names
+            if company_search and names is not None:
+                suggestions = names.suggest(company_search, limit=5)
+                if suggestions and suggestions != [company_search]:
+                    st.pills("Suggestions", suggestions, key="screener_company_suggestion",
+                             on_change=use_suggestion, label_visibility="collapsed")
+                matched, exact = names.match(company_search)
+                if matched and not exact:
+                    st.caption("No exact match, showing similar names")
         
         with col2:
             st.markdown("💰 **Price (₹)**")
@@ -243,69 +584,109 @@ def show_quarterly_screener():
                 eps_yoy_max = st.number_input("Maximum", value=500.0, key="screener_eps_max", label_visibility="visible")
             eps_yoy = (eps_yoy_min, eps_yoy_max)
         
-        # Apply filters
-        filtered_df = df.copy()
-        
-        if company_search:
-            if 'Company' in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df['Company'].str.contains(company_search, case=False, na=False)]
-        
-        if 'Price' in filtered_df.columns:
-            filtered_df = filtered_df[(filtered_df['Price'].between(price_range[0], price_range[1], inclusive='both') | filtered_df['Price'].isna())]
-        
-        if 'Market_Cap' in filtered_df.columns:
-            filtered_df = filtered_df[(filtered_df['Market_Cap'].between(mcap_range[0], mcap_range[1], inclusive='both') | filtered_df['Market_Cap'].isna())]
-        
-        if 'Sales_YOY' in filtered_df.columns:
-            filtered_df = filtered_df[(filtered_df['Sales_YOY'].between(sales_yoy[0], sales_yoy[1], inclusive='both') | filtered_df['Sales_YOY'].isna())]
-        
-        if 'EBIDT_YOY' in filtered_df.columns:
-            filtered_df = filtered_df[(filtered_df['EBIDT_YOY'].between(ebidt_yoy[0], ebidt_yoy[1], inclusive='both') | filtered_df['EBIDT_YOY'].isna())]
-        
-        if 'NetProfit_YOY' in filtered_df.columns:
-            filtered_df = filtered_df[(filtered_df['NetProfit_YOY'].between(profit_yoy[0], profit_yoy[1], inclusive='both') | filtered_df['NetProfit_YOY'].isna())]
-        
-        if 'EPS_YOY' in filtered_df.columns:
-            filtered_df = filtered_df[(filtered_df['EPS_YOY'].between(eps_yoy[0], eps_yoy[1], inclusive='both') | filtered_df['EPS_YOY'].isna())]
+        # Apply filters: one mask over the column arrays, then a single take of the rows and columns shown
+        ranges = (
+            ('Price', price_range),
+            ('Market_Cap', mcap_range),
+            ('Sales_YOY', sales_yoy),
+            ('EBIDT_YOY', ebidt_yoy),
+            ('NetProfit_YOY', profit_yoy),
+            ('EPS_YOY', eps_yoy),
+        )
+        positions = cached_filter_positions(df, st.session_state.screener_data_version, company_search, ranges)
         
         st.markdown("---")
-        st.subheader(f"📋 Results ({len(filtered_df)} companies)")
-        
-        column_order = [
-            'Company', 'Price', 'Market_Cap', 'PE',
-            'Sales_YOY', 'Sales_Dec25', 'Sales_Sep25', 'Sales_Dec24',
-            'EBIDT_YOY', 'EBIDT_Dec25', 'EBIDT_Sep25', 'EBIDT_Dec24',
-            'NetProfit_YOY', 'NetProfit_Dec25', 'NetProfit_Sep25', 'NetProfit_Dec24',
-            'EPS_YOY', 'EPS_Dec25', 'EPS_Sep25', 'EPS_Dec24'
-        ]
+        st.subheader(f"📋 Results ({len(positions)} companies)")
         
-        column_order = [col for col in column_order if col in filtered_df.columns]
-        display_df = filtered_df[column_order]
+        column_order = result_column_order(df.columns)
+        display_df = df.iloc[positions, [df.columns.get_loc(col) for col in column_order]]
         
         st.dataframe(
             display_df,
             use_container_width=True,
             height=600,
-            column_config={
-                "Company": st.column_config.TextColumn("Company", width="medium"),
-                "Price": st.column_config.NumberColumn("Price (₹)", format="%.2f"),
-                "Market_Cap": st.column_config.NumberColumn("M.Cap (Cr)", format="%.2f"),
-                "PE": st.column_config.NumberColumn("P/E", format="%.1f"),
-                "Sales_YOY": st.column_config.NumberColumn("Sales YOY%", format="%.1f"),
-                "EBIDT_YOY": st.column_config.NumberColumn("EBIDT YOY%", format="%.1f"),
-                "NetProfit_YOY": st.column_config.NumberColumn("Profit YOY%", format="%.1f"),
-                "EPS_YOY": st.column_config.NumberColumn("EPS YOY%", format="%.1f"),
-            }
+            column_config=column_config(column_order)
         )
         
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download CSV",
-            data=csv,
-            file_name="quarterly_results.csv",
-            mime="text/csv",
-            key="screener_download"
-        )
+        # The file is only built when Download is clicked, then cached for this data + filter setting
+        col_fmt, col_download = st.columns([2, 1])
+        with col_fmt:
+            export_format = st.radio(
+                "Export format",
+                list(EXPORT_FORMATS),
+                format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+                horizontal=True,
+                key="screener_export_format"
+            )
+        label, extension, mime = EXPORT_FORMATS[export_format]
+        export_key = fingerprint(st.session_state.screener_data_version, company_search, ranges)
+        with col_download:
+            st.download_button(
+                label=f"📥 Download {label}",
+                data=lambda: cached_export(lambda: df.iloc[positions], export_format, export_key),
+                file_name=f"quarterly_results{extension}",
+                mime=mime,
+                key="screener_download"
+            )
+        
+        # Full history from each company's own page, for the companies shown above
+        st.markdown("---")
+        st.subheader("🏢 Company Details")
+        st.caption("Full quarterly history, balance sheet and ratios from each company's page. Company pages are fetched over HTTP under the same rate limit and page cache settings.")
+        if st.button(f"🏢 Fetch details for {len(positions)} companies", key="screener_fetch_details"):
+            shown = set(display_df['Company'].dropna())
+            details_progress = st.progress(0)
+            details_status = st.empty()
+            
+            def update_details_progress(completed, total):
+                details_progress.progress(completed / total)
+                details_status.text(f"Company page {completed}/{total}...")
+            
+            cache = PageCache(ttl=cache_ttl_min * 60) if use_cache else None
+            rate_controller = AdaptiveRateController(max_concurrency=num_workers) if auto_rate else None
+            details_stats = {}
+            # Links were kept by the scrape, so the listing isn't read again
+            links = [(company, href) for company, href in st.session_state.get('screener_links', []) if company in shown]
+            missing = len(shown - {company for company, _ in links})
+            if missing:
+                st.warning(f"⚠️ {missing} company(s) have no page link (scraped before links were kept). Fetch the results again to include them.")
+            try:
+                st.session_state.screener_details = crawl_company_details(
+                    links,
+                    cache=cache,
+                    rate_controller=rate_controller,
+                    progress_callback=update_details_progress,
+                    run_stats=details_stats
+                )
+                st.session_state.screener_details_version = uuid.uuid4().hex
+                details_status.text(f"✅ {details_stats['pages']} company pages ({details_stats['cache_hits']} from cache) at {details_stats['pages_per_sec']:.2f} pages/s")
+                if details_stats['login_expired']:
+                    st.error("🔑 Login expired while fetching company pages. Upload fresh cookies and fetch again.")
+                elif details_stats['failed']:
+                    st.warning(f"⚠️ {len(details_stats['failed'])} company page(s) failed: " + ', '.join(sorted(details_stats['failed'])[:5]))
+            except Exception as e:
+                st.error(f"Error fetching company pages: {e}")
+        
+        details = st.session_state.get('screener_details')
+        if details:
+            col_table, col_details_download = st.columns([2, 1])
+            with col_table:
+                detail_table = st.radio(
+                    "Table",
+                    list(DETAIL_TABLES),
+                    format_func=lambda name: f"{DETAIL_LABELS[name]} ({len(details[name])} rows)",
+                    horizontal=True,
+                    key="screener_detail_table"
+                )
+            st.dataframe(details[detail_table], use_container_width=True, height=400)
+            with col_details_download:
+                st.download_button(
+                    label=f"📥 Download {label}",
+                    data=lambda: cached_export(lambda: details[detail_table], export_format, fingerprint(st.session_state.screener_details_version, detail_table)),
+                    file_name=f"company_{detail_table}{extension}",
+                    mime=mime,
+                    key="screener_details_download"
+                )
     
     else:
         st.info("👆 Click 'Fetch Quarterly Results' to load data")
@@ -0,0 +1,91 @@
+"""
+Check and benchmark the indexed screen (filters.ScreenIndex) against the plain scan
+
+The index must return exactly the rows filter_positions does, and both the
+rows within the bounds compared in float64. Queries are
+random ranges over a synthetic float32 frame, plus bounds placed on and just
+beside stored values, where rounding a float64 bound to float32 could pick a
+different row. Then both are timed on selective screens.
+
+Usage:
+    python bench_filters.py [--rows N] [--queries N]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from filters import ScreenIndex, filter_positions
+
+COLUMNS = ['Price', 'Market_Cap', 'Sales_YOY', 'EPS_YOY']
+
+def make_frame(rows, seed=0):
+    """float32 columns with the spread of the real data and ~5% missing values"""
+    rng = np.random.default_rng(seed)
+    data = {
+        'Price': rng.lognormal(5, 1.5, rows),
+        'Market_Cap': rng.lognormal(7, 2, rows),
+        'Sales_YOY': rng.normal(10, 40, rows),
+        'EPS_YOY': rng.normal(5, 60, rows),
+    }
+    df = pd.DataFrame({column: values.astype(np.float32) for column, values in data.items()})
+    for column in COLUMNS:
+        df.loc[rng.random(rows) < 0.05, column] = np.nan
+    return df
+
+def edge_bound(rng, values):
+    """A float64 bound on, or a hair beside, one of the stored float32 values"""
+    value = np.float64(rng.choice(values[~np.isnan(values)]))
+    return value + rng.choice([0.0, -1.0, 1.0]) * rng.choice([1e-9, 1e-7, 1e-5]) * max(abs(value), 1.0)
+
+def random_ranges(rng, df):
+    ranges = {}
+    for column in rng.choice(COLUMNS, size=rng.integers(1, len(COLUMNS) + 1), replace=False).tolist():
+        values = df[column].to_numpy()
+        if rng.random() < 0.5:
+            low, high = sorted(edge_bound(rng, values) for _ in range(2))
+        else:
+            low, high = sorted(np.nanpercentile(values, rng.uniform(0, 100, 2)))
+        # Python floats and NumPy float64 scalars (e.g. from a frame) must select the same rows
+        ranges[column] = (float(low), float(high)) if rng.random() < 0.5 else (np.float64(low), np.float64(high))
+    return ranges
+
+def check_outputs(df, index, queries, seed=1):
+    """The index and the scan must both keep exactly the rows within the bounds, compared in float64"""
+    rng = np.random.default_rng(seed)
+    for _ in range(queries):
+        ranges = random_ranges(rng, df)
+        expected = np.ones(len(df), dtype=bool)
+        for column, (low, high) in ranges.items():
+            values = df[column].to_numpy(dtype=np.float64)
+            expected &= ((values >= low) & (values <= high)) | np.isnan(values)
+        expected = np.flatnonzero(expected)
+        if not np.array_equal(filter_positions(df, '', ranges), expected):
+            raise SystemExit(f"❌ filter_positions differs from the float64 comparison for {ranges}")
+        if not np.array_equal(np.sort(index.positions('', ranges)), expected):
+            raise SystemExit(f"❌ ScreenIndex differs from filter_positions for {ranges}")
+
+def bench(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--rows', type=int, default=100_000, help="Rows in the synthetic frame")
+    arg_parser.add_argument('--queries', type=int, default=2000, help="Random queries to check")
+    args = arg_parser.parse_args()
+
+    df = make_frame(args.rows)
+    index = ScreenIndex(df, COLUMNS)
+    check_outputs(df, index, args.queries)
+    print(f"✅ Index matches the scan on {args.queries} queries\n")
+
+    ranges = {'Price': (100.0, 120.0), 'Sales_YOY': (50.0, 500.0)}
+    scan_ms = bench(lambda: filter_positions(df, '', ranges), 20)
+    index_ms = bench(lambda: index.positions('', ranges), 200)
+    print(f"Selective screen over {args.rows} rows: scan {scan_ms:.3f} ms, index {index_ms:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark the results-page parsers against the recorded pages in sample_pages/
+
+Checks that every parser's output is identical to the BeautifulSoup reference,
+then reports parse throughput (pages/sec, companies/sec) and peak Python heap
+usage per parser. Results can be saved and later used as a baseline so parser
+changes fail on regressions.
+
+Usage:
+    python bench_parser.py [--repeat N]
+    python bench_parser.py --save bench_baseline.json
+    python bench_parser.py --baseline bench_baseline.json [--max-regression 0.15]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+from results_parser import PARSERS, parse_results_html
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_pages')
+
+def load_pages(sample_dir=SAMPLE_DIR):
+    """Load the corpus as {file name: raw bytes}, the way pages arrive off the wire"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(sample_dir, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+def check_outputs(pages):
+    """Every parser must produce exactly the reference parser's records"""
+    for name, html in pages.items():
+        expected = parse_results_html(html, parser='bs4')
+        for parser in PARSERS:
+            if parse_results_html(html, parser=parser) != expected:
+                raise SystemExit(f"❌ {parser} output differs from reference on {name}")
+
+def bench_parser(parser, pages, repeat):
+    """Parse the whole corpus `repeat` times; return throughput and peak memory"""
+    companies = sum(len(parse_results_html(html, parser=parser)) for html in pages.values())
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages.values():
+            parse_results_html(html, parser=parser)
+    elapsed = time.perf_counter() - start
+
+    # Measured separately so tracing overhead doesn't skew the timings
+    tracemalloc.start()
+    for html in pages.values():
+        parse_results_html(html, parser=parser)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'pages_per_sec': len(pages) * repeat / elapsed,
+        'companies_per_sec': companies * repeat / elapsed,
+        'peak_mem_kb': peak / 1024,
+    }
+
+def find_regressions(results, baseline, max_regression):
+    regressions = []
+    for parser, stats in results.items():
+        base = baseline.get(parser)
+        if not base:
+            continue
+        if stats['pages_per_sec'] < base['pages_per_sec'] * (1 - max_regression):
+            regressions.append(f"{parser}: {stats['pages_per_sec']:.1f} pages/sec vs baseline {base['pages_per_sec']:.1f}")
+        if stats['peak_mem_kb'] > base['peak_mem_kb'] * (1 + max_regression):
+            regressions.append(f"{parser}: peak {stats['peak_mem_kb']:.0f} KB vs baseline {base['peak_mem_kb']:.0f} KB")
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--repeat', type=int, default=20, help="Passes over the corpus per parser")
+    arg_parser.add_argument('--save', help="Write results as JSON (e.g. to use as a baseline)")
+    arg_parser.add_argument('--baseline', help="JSON from a previous --save to compare against")
+    arg_parser.add_argument('--max-regression', type=float, default=0.15,
+                            help="Allowed fractional drop in pages/sec or growth in peak memory")
+    args = arg_parser.parse_args()
+
+    pages = load_pages()
+    if not pages:
+        raise SystemExit(f"No pages found in {SAMPLE_DIR}")
+
+    check_outputs(pages)
+    print(f"✅ Outputs identical on {len(pages)} pages\n")
+
+    results = {parser: bench_parser(parser, pages, args.repeat) for parser in PARSERS}
+
+    print(f"{'Parser':<8}{'Pages/sec':>12}{'Companies/sec':>16}{'Peak heap (KB)':>16}")
+    for parser, stats in results.items():
+        print(f"{parser:<8}{stats['pages_per_sec']:>12.1f}{stats['companies_per_sec']:>16.1f}{stats['peak_mem_kb']:>16.0f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\n❌ Regressions beyond {args.max_regression:.0%}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.max_regression:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Columnar, typed accumulation of scraped records
+
+Records are appended straight into preallocated NumPy arrays instead of being
+kept as a list of dicts, and come out as DataFrames with a fixed schema:
+float32 for every value and categoricals for text. For long histories this
+needs a fraction of the memory of dict records and object/float64 frames.
+
+Two layouts are supported:
+    wide: one row per record, one column per record key (ColumnarBuilder)
+    long: one row per (Company, Metric, Quarter, Value) (LongBuilder), with
+        the number of the record it came from. Any number of quarters can be
+        stored together and a new quarter is just appended; long_to_wide()
+        pivots it back for display.
+
+Company pages (company_parser) are stored the same long way, one frame per
+statement (DetailBuilder).
+"""
+
+from array import array
+import numpy as np
+import pandas as pd
+from company_parser import DETAIL_TABLES
+from results_parser import (
+    METRIC_ROWS, SNAPSHOT_COLUMNS, quarter_from_ordinal, quarter_label, quarter_ordinal, quarter_suffix, result_column_order
+)
+
+TEXT_COLUMNS = ('Company', 'Quarter', 'Link')
+METRIC_DTYPE = np.float32
+
+LONG_COLUMNS = ['Company', 'Metric', 'Quarter', 'Value', 'Record']
+# Long-layout metrics that describe the result as a whole, stored against its quarter
+SNAPSHOT_METRICS = SNAPSHOT_COLUMNS + [f'{metric}_YOY' for metric in METRIC_ROWS]
+# Quarters shown per metric in the wide view, as quarters before the latest (the listing's layout)
+WIDE_HISTORY = (0, 1, 4)
+
+class _Categories:
+    """Text -> int32 code mapping that grows as new values are seen"""
+    def __init__(self):
+        self.codes = {}
+
+    def code(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    def categorical(self, codes):
+        return pd.Categorical.from_codes(codes, categories=list(self.codes))
+
+def _grown(values, size, capacity, fill):
+    grown = np.full(capacity, fill, dtype=values.dtype)
+    grown[:size] = values[:size]
+    return grown
+
+class ColumnarBuilder:
+    """
+    Append-only builder for wide result frames
+
+    Args:
+        columns: Column names, in frame order. TEXT_COLUMNS become categoricals,
+            everything else float32. None (default) discovers columns from the
+            records, in the order their keys first appear.
+        capacity: Rows preallocated; the arrays double whenever they fill up
+    """
+    def __init__(self, columns=None, capacity=1024):
+        self.size = 0
+        self._capacity = max(1, capacity)
+        self._fixed = columns is not None
+        self.columns = []
+        self._numeric = {}
+        # Text is stored as int32 codes into a growing list of categories
+        self._codes = {}
+        self._categories = {}
+        for column in columns or ():
+            self._add_column(column)
+
+    def __len__(self):
+        return self.size
+
+    def _add_column(self, column):
+        self.columns.append(column)
+        if column in TEXT_COLUMNS:
+            self._codes[column] = np.full(self._capacity, -1, dtype=np.int32)
+            self._categories[column] = _Categories()
+        else:
+            self._numeric[column] = np.full(self._capacity, np.nan, dtype=METRIC_DTYPE)
+
+    def _grow(self, needed):
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        for column, values in self._numeric.items():
+            self._numeric[column] = _grown(values, self.size, self._capacity, np.nan)
+        for column, codes in self._codes.items():
+            self._codes[column] = _grown(codes, self.size, self._capacity, -1)
+
+    def _discover(self, records):
+        if self._fixed:
+            return
+        known = set(self.columns)
+        for record in records:
+            for key in record:
+                if key not in known:
+                    known.add(key)
+                    self._add_column(key)
+
+    def append(self, record):
+        """Append one record dict; missing or None values become NaN"""
+        self.extend([record])
+
+    def extend(self, records):
+        """Append a batch of record dicts, filling each column in one pass"""
+        records = records if isinstance(records, list) else list(records)
+        count = len(records)
+        if not count:
+            return
+        self._discover(records)
+        self._grow(self.size + count)
+        start, end = self.size, self.size + count
+        for column, values in self._numeric.items():
+            values[start:end] = np.fromiter(
+                (np.nan if value is None else value for value in (record.get(column) for record in records)),
+                dtype=METRIC_DTYPE, count=count
+            )
+        for column, codes in self._codes.items():
+            categories = self._categories[column]
+            codes[start:end] = [categories.code(record.get(column)) for record in records]
+        self.size = end
+
+    def to_frame(self):
+        data = {}
+        for column in self.columns:
+            if column in self._numeric:
+                data[column] = self._numeric[column][:self.size]
+            else:
+                data[column] = self._categories[column].categorical(self._codes[column][:self.size])
+        return pd.DataFrame(data, columns=self.columns)
+
+def records_to_frame(records, columns=None):
+    """Typed wide DataFrame from an iterable of record dicts"""
+    builder = ColumnarBuilder(columns)
+    builder.extend(records)
+    return builder.to_frame()
+
+def conform_frame(df):
+    """
+    Cast a frame to the typed schema
+
+    Needed after pd.concat, which turns categoricals with different categories
+    back into object columns.
+    """
+    dtypes = {
+        column: 'category' if column in TEXT_COLUMNS or column == 'Metric' else np.int32 if column == 'Record' else METRIC_DTYPE
+        for column in df.columns
+    }
+    return df.astype(dtypes)
+
+def concat_long(frames):
+    """
+    Concatenate long frames into one typed frame, in order
+
+    Every frame numbers its records from 0, so each frame's Record numbers are
+    shifted past the previous frames' to keep the records apart.
+    """
+    shifted = []
+    offset = 0
+    for df in frames:
+        shifted.append(df.assign(Record=df['Record'].to_numpy() + offset))
+        if len(df):
+            offset += int(df['Record'].max()) + 1
+    return conform_frame(pd.concat(shifted, ignore_index=True))
+
+def long_key(key, quarter):
+    """(metric, quarter label) for a wide record key, given the record's result quarter"""
+    if key in SNAPSHOT_METRICS:
+        return key, quarter
+    metric, _, suffix = key.rpartition('_')
+    return metric, quarter_label(suffix)
+
+class LongBuilder:
+    """
+    Append-only builder for long (Company, Metric, Quarter, Value, Record) frames
+
+    Takes the same wide record dicts as ColumnarBuilder; each non-missing value
+    becomes one row (the Link text is not kept, see detail_crawler.record_links).
+    Company, Metric and Quarter are category codes, Value is float32 and Record
+    numbers the records in the order they were appended, so each extra quarter
+    of history costs a few bytes per value.
+    """
+    def __init__(self, capacity=4096):
+        self.size = 0
+        self.records = 0
+        self._capacity = max(1, capacity)
+        self._codes = {column: np.empty(self._capacity, dtype=np.int32) for column in LONG_COLUMNS[:3]}
+        self._categories = {column: _Categories() for column in LONG_COLUMNS[:3]}
+        self._values = np.empty(self._capacity, dtype=METRIC_DTYPE)
+        self._records = np.empty(self._capacity, dtype=np.int32)
+        self._keys = {}  # (wide key, quarter) -> (metric code, quarter code)
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed):
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        for column, codes in self._codes.items():
+            self._codes[column] = _grown(codes, self.size, self._capacity, -1)
+        self._values = _grown(self._values, self.size, self._capacity, np.nan)
+        self._records = _grown(self._records, self.size, self._capacity, -1)
+
+    def _key_codes(self, key, quarter):
+        codes = self._keys.get((key, quarter))
+        if codes is None:
+            metric, value_quarter = long_key(key, quarter)
+            codes = self._keys[(key, quarter)] = (
+                self._categories['Metric'].code(metric),
+                self._categories['Quarter'].code(value_quarter),
+            )
+        return codes
+
+    def extend(self, records):
+        company_codes, metric_codes, quarter_codes, values, record_numbers = [], [], [], [], []
+        for record in records:
+            record_number = self.records
+            self.records += 1
+            company = self._categories['Company'].code(record.get('Company'))
+            quarter = record.get('Quarter')
+            for key, value in record.items():
+                if key in TEXT_COLUMNS or value is None or value != value:  # skip text and missing values
+                    continue
+                metric_code, quarter_code = self._key_codes(key, quarter)
+                company_codes.append(company)
+                metric_codes.append(metric_code)
+                quarter_codes.append(quarter_code)
+                values.append(value)
+                record_numbers.append(record_number)
+
+        count = len(values)
+        self._grow(self.size + count)
+        start, end = self.size, self.size + count
+        self._codes['Company'][start:end] = company_codes
+        self._codes['Metric'][start:end] = metric_codes
+        self._codes['Quarter'][start:end] = quarter_codes
+        self._values[start:end] = values
+        self._records[start:end] = record_numbers
+        self.size = end
+
+    def append(self, record):
+        self.extend([record])
+
+    def to_frame(self):
+        data = {
+            column: self._categories[column].categorical(self._codes[column][:self.size])
+            for column in LONG_COLUMNS[:3]
+        }
+        data['Value'] = self._values[:self.size]
+        data['Record'] = self._records[:self.size]
+        return pd.DataFrame(data, columns=LONG_COLUMNS)
+
+class DetailBuilder:
+    """
+    Append-only builder for the company-page tables (company_parser.DETAIL_TABLES)
+
+    Each table is long: Company, line item and period are category codes and
+    Value is float32, kept in compact arrays until to_frames().
+    """
+    def __init__(self):
+        self._companies = _Categories()
+        self._tables = {
+            name: {
+                'company': array('i'),
+                'line': array('i'),
+                'period': array('i'),
+                'value': array('f'),
+                'lines': _Categories(),
+                'periods': _Categories(),
+            }
+            for name in DETAIL_TABLES
+        }
+
+    def __len__(self):
+        return sum(len(table['value']) for table in self._tables.values())
+
+    def extend(self, company, tables):
+        """Append one company's parsed tables ({table name: [(line, period, value)]})"""
+        company_code = self._companies.code(company)
+        for name, rows in tables.items():
+            table = self._tables[name]
+            table['company'].extend([company_code] * len(rows))
+            table['line'].extend(table['lines'].code(line) for line, _, _ in rows)
+            table['period'].extend(table['periods'].code(period) for _, period, _ in rows)
+            table['value'].extend(value for _, _, value in rows)
+
+    def to_frames(self):
+        """{table name: DataFrame with that table's DETAIL_TABLES columns}"""
+        frames = {}
+        for name, table in self._tables.items():
+            columns = DETAIL_TABLES[name][1]
+            frames[name] = pd.DataFrame({
+                columns[0]: self._companies.categorical(np.array(table['company'], dtype=np.int32)),
+                columns[1]: table['lines'].categorical(np.array(table['line'], dtype=np.int32)),
+                columns[2]: table['periods'].categorical(np.array(table['period'], dtype=np.int32)),
+                columns[3]: np.array(table['value'], dtype=METRIC_DTYPE),
+            }, columns=columns)
+        return frames
+
+def records_to_long(records):
+    """Typed long DataFrame from an iterable of record dicts"""
+    builder = LongBuilder()
+    builder.extend(records)
+    return builder.to_frame()
+
+def frame_to_long(df):
+    """Long DataFrame from a wide result frame"""
+    return records_to_long(df.to_dict('records'))
+
+def long_to_wide(long_df, history=WIDE_HISTORY):
+    """
+    Wide view of a long frame: one row per company, for its latest result
+
+    Each row holds the company's latest result quarter, the snapshot values and
+    YOY changes reported with it, and every metric for the quarters `history`
+    steps before it (by default: latest, previous and year-ago quarter). All
+    values come from one record (the Record column): where a company has
+    several records for its latest quarter, the first one in the frame is used.
+    """
+    df = long_df[long_df['Company'].notna()]
+    if df.empty:
+        return pd.DataFrame({'Company': pd.Categorical([]), 'Quarter': pd.Categorical([])})
+
+    # Records renumbered 0.. in order of first appearance
+    records, _ = pd.factorize(df['Record'].to_numpy())
+    companies = df['Company'].cat.codes.to_numpy()
+    metrics = df['Metric'].cat.codes.to_numpy()
+    quarters = df['Quarter'].cat.codes.to_numpy()
+    metric_names = list(df['Metric'].cat.categories)
+    quarter_names = list(df['Quarter'].cat.categories)
+    # Months-since-year-0 per row; -1 for a missing or unrecognised quarter (code -1 picks the trailing entry)
+    ordinals = np.array([quarter_ordinal(label) or -1 for label in quarter_names] + [-1])[quarters]
+
+    # Result quarter per record, judged by its snapshot rows (any row if it has none)
+    is_snapshot = np.isin(metrics, [code for code, name in enumerate(metric_names) if name in SNAPSHOT_METRICS])
+    n_records = records.max() + 1
+    record_latest = np.full(n_records, -1)
+    np.maximum.at(record_latest, records, np.where(is_snapshot, ordinals, -1))
+    any_latest = np.full(n_records, -1)
+    np.maximum.at(any_latest, records, ordinals)
+    record_latest = np.where(record_latest >= 0, record_latest, any_latest)
+    record_company = np.zeros(n_records, dtype=companies.dtype)
+    record_company[records] = companies
+
+    # Each company's latest result quarter, and the first record reporting it
+    n_companies = len(df['Company'].cat.categories)
+    latest = np.full(n_companies, -1)
+    np.maximum.at(latest, record_company, record_latest)
+    first = np.full(n_companies, n_records)
+    is_latest = record_latest == latest[record_company]
+    np.minimum.at(first, record_company[is_latest], np.arange(n_records)[is_latest])
+    chosen = records == first[companies]
+    # A key repeated inside one record keeps its first value
+    chosen &= ~pd.DataFrame({'record': records, 'metric': metrics, 'quarter': quarters}).duplicated().to_numpy()
+
+    row_latest = latest[companies]
+    in_history = np.isin((row_latest - ordinals) / 3, history) & (ordinals >= 0)
+    keep = chosen & np.where(is_snapshot, ordinals == row_latest, in_history)
+    companies, metrics, quarters = companies[keep], metrics[keep], quarters[keep]
+    values = df['Value'].to_numpy()[keep]
+
+    # One wide column per distinct (metric, quarter) pair kept
+    pairs, pair_of_row = np.unique(metrics.astype(np.int64) * (len(quarter_names) + 1) + quarters + 1, return_inverse=True)
+    pair_names = []
+    for pair in pairs:
+        metric, quarter = divmod(int(pair), len(quarter_names) + 1)
+        name = metric_names[metric]
+        pair_names.append(name if name in SNAPSHOT_METRICS else f"{name}_{quarter_suffix(quarter_names[quarter - 1])}")
+    columns = list(dict.fromkeys(pair_names))
+    column_of_pair = np.array([columns.index(name) for name in pair_names])
+
+    # Rows in order of each company's first appearance
+    company_order = pd.unique(df['Company'].cat.codes.to_numpy())
+    row_of_company = np.full(n_companies, -1)
+    row_of_company[company_order] = np.arange(len(company_order))
+
+    table = np.full((len(company_order), len(columns)), np.nan, dtype=METRIC_DTYPE)
+    table[row_of_company[companies], column_of_pair[pair_of_row]] = values
+
+    wide = pd.DataFrame(table, columns=columns)
+    wide.insert(0, 'Company', pd.Categorical.from_codes(company_order, categories=df['Company'].cat.categories))
+    wide.insert(1, 'Quarter', pd.Categorical([
+        quarter_from_ordinal(latest[code]) if latest[code] >= 0 else None for code in company_order
+    ]))
+    return wide[result_column_order(wide.columns)]
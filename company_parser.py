@@ -0,0 +1,99 @@
+"""
+Parser for a company's own page on Screener.in (/company/<symbol>/...)
+
+The page has one `section` per statement, each holding a `table.data-table`
+whose header names the periods ("Dec 2025", "Mar 2025") and whose rows are
+line items ("Sales +", "OPM %", ...). Current values (Market Cap, P/E, ROCE,
+...) are listed in `ul#top-ratios`. Each table is flattened to long rows of
+(line, period, value), the same shape as the listing's long layout, so any
+number of periods per company fits one table.
+"""
+
+import re
+from lxml import html as lxml_html
+from results_parser import parse_value
+
+# Table name -> (section id on the page, frame columns)
+DETAIL_TABLES = {
+    'quarters': ('quarters', ['Company', 'Metric', 'Quarter', 'Value']),
+    'balance_sheet': ('balance-sheet', ['Company', 'Line', 'Period', 'Value']),
+    'ratios': ('ratios', ['Company', 'Ratio', 'Period', 'Value']),
+}
+# Period of the top-ratios values, stored in the ratios table
+CURRENT_PERIOD = 'Current'
+
+def _has_class(element, class_name):
+    return class_name in (element.get('class') or '').split()
+
+def _text(element):
+    return ' '.join(element.text_content().replace('\xa0', ' ').split())
+
+def _line_label(cell):
+    """Row label without the expand button's '+' ("Sales +" -> "Sales")"""
+    return re.sub(r'\s*\+$', '', _text(cell))
+
+def _number(text):
+    """'1,234' / '₹ 1,234 Cr.' / '12%' -> float, None for blanks and non-numbers"""
+    match = re.search(r'-?[\d,]*\.?\d+', text or '')
+    return parse_value(match.group(0)) if match else None
+
+def _table_rows(table):
+    """(line, period, value) for every filled cell of a statement table"""
+    thead = next(table.iterdescendants('thead'), None)
+    periods = [_text(th) for th in thead.iterdescendants('th')][1:] if thead is not None else []
+    tbody = next(table.iterdescendants('tbody'), None)
+    rows = []
+    if tbody is None:
+        return rows
+    for tr in tbody.iterdescendants('tr'):
+        cells = list(tr.iterchildren('td'))
+        if not cells:
+            continue
+        line = _line_label(cells[0])
+        for period, cell in zip(periods, cells[1:]):
+            value = _number(_text(cell))
+            if value is not None:
+                rows.append((line, period, value))
+    return rows
+
+def _top_ratios(root):
+    rows = []
+    for ul in root.iter('ul'):
+        if ul.get('id') != 'top-ratios':
+            continue
+        for li in ul.iterdescendants('li'):
+            name = next((span for span in li.iterdescendants('span') if _has_class(span, 'name')), None)
+            number = next((span for span in li.iterdescendants('span') if _has_class(span, 'number')), None)
+            if name is None or number is None:
+                continue
+            value = _number(_text(number))
+            if value is not None:
+                rows.append((_text(name), CURRENT_PERIOD, value))
+    return rows
+
+def parse_company_page(html):
+    """
+    Parse a company page into (company, {table name: [(line, period, value)]})
+
+    company is the page's h1 (None if missing). Every DETAIL_TABLES name is
+    present; a section missing from the page (or a login page) gives no rows.
+    """
+    tables = {name: [] for name in DETAIL_TABLES}
+    if not html or not html.strip():
+        return None, tables
+
+    root = lxml_html.fromstring(html)
+    h1 = next(root.iter('h1'), None)
+    company = _text(h1) if h1 is not None else None
+
+    sections = {section_id: name for name, (section_id, _) in DETAIL_TABLES.items()}
+    for section in root.iter('section'):
+        name = sections.get(section.get('id'))
+        if name is None:
+            continue
+        table = next((t for t in section.iter('table') if _has_class(t, 'data-table')), None)
+        if table is not None:
+            tables[name].extend(_table_rows(table))
+
+    tables['ratios'].extend(_top_ratios(root))
+    return company, tables
@@ -0,0 +1,275 @@
+"""
+Crawler for each company's own page (full quarterly history, balance sheet, ratios)
+
+The results listing links every company (`a.font-weight-500`) to its page.
+The listing scrape keeps each record's link (`Link`, see record_links); without
+scraped records, links are read from the listing pages (listing_links).
+Either way they are deduplicated by URL. Company pages are then
+fetched by a pool of threads over one pooled HTTP session: the pages are
+server-rendered, so no browser is needed. Every request waits for one shared
+rate limit, either an AdaptiveRateController (the same tuned state as the
+listing scrape) or a fixed requests/sec TokenBucket, however many threads
+run. Pages go through the PageCache keyed by URL, so a re-run only requests
+what has expired. Each page is parsed as it arrives (company_parser).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Event, current_thread
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from columnar import DetailBuilder
+from company_parser import parse_company_page
+from metrics import RunMetrics, format_summary, span
+from rate_limit import TokenBucket
+from results_parser import parse_company_links, parse_page_count
+from scraper import (
+    BASE_URL, ERROR_BACKOFF, MAX_PAGE_ATTEMPTS, PAGE_TIMEOUT, LoginRequired,
+    empty_is_throttled, fetch_url_http, init_session, is_empty_page, rate_controlled, results_page_url
+)
+from session_manager import get_session_manager
+
+DETAIL_WORKERS = 8  # Threads fetching company pages (the rate limit decides how fast)
+DETAIL_RATE = 2.0   # Requests per second across all threads without a rate controller
+
+def company_url(href):
+    """Absolute URL for a company link, without query or fragment and with a trailing slash"""
+    parts = urlsplit(urljoin(BASE_URL, href))
+    path = parts.path if parts.path.endswith('/') else parts.path + '/'
+    return urlunsplit((parts.scheme, parts.netloc, path, '', ''))
+
+def dedupe_links(links):
+    """{url: company} from (company, href) pairs, in first-seen order"""
+    urls = {}
+    for company, href in links:
+        urls.setdefault(company_url(href), company)
+    return urls
+
+def record_links(records):
+    """
+    Distinct (company, href) pairs from scraped records' Link values, in record order
+
+    Records without a link (None, or NaN in a frame's records) are skipped.
+    """
+    return list(dict.fromkeys(
+        (record.get('Company'), record['Link']) for record in records if isinstance(record.get('Link'), str)
+    ))
+
+def fetch_html(session, url, cache=None, rate_controller=None, bucket=None, timeout=PAGE_TIMEOUT, metrics=None, is_empty=is_empty_page):
+    """
+    Return (html, from_cache) for a URL
+
+    Fresh cache entries are served without a request or a rate-limit wait;
+    requests wait for the rate controller (which is told how they went, with
+    is_empty(html) telling whether the page looks throttled) or take a token
+    from the bucket.
+    """
+    if cache:
+        with span(metrics, 'cache', url):
+            html = cache.get_fresh(url)
+        if html is not None:
+            return html, True
+
+    def fetch():
+        return fetch_url_http(session, url, timeout=timeout, cache=cache, metrics=metrics, page=url)
+
+    if rate_controller is not None:
+        return rate_controlled(fetch, rate_controller, is_empty, metrics, url), False
+    if bucket is not None:
+        with span(metrics, 'throttle', url):
+            bucket.acquire()
+    return fetch(), False
+
+def listing_links(pages_list=None, cache=None, num_workers=DETAIL_WORKERS, requests_per_second=DETAIL_RATE, rate_controller=None, timeout=PAGE_TIMEOUT):
+    """
+    Company links from the results listing, deduplicated: {url: company}
+
+    With pages_list None, every page is read: the page count comes from page
+    1's pagination (without it, pages are read until an empty one). Pass the
+    scrape's PageCache so pages it fetched are not requested again.
+    """
+    bucket = TokenBucket(requests_per_second) if rate_controller is None else None
+    session = init_session(pool_size=num_workers)
+
+    page_count = None
+
+    def read(page_num):
+        # Past the end of the listing an empty page is expected, not a throttling sign
+        def is_empty(html):
+            return is_empty_page(html) and empty_is_throttled(page_num, page_count)
+        try:
+            html, _ = fetch_html(session, results_page_url(page_num), cache, rate_controller, bucket, timeout, is_empty=is_empty)
+            return html
+        except LoginRequired:
+            raise
+        except Exception as e:
+            print(f"⚠️ Could not read listing page {page_num}: {e}")
+            return ''
+
+    pages = {}
+    try:
+        if pages_list is None:
+            html = read(1)
+            pages[1] = parse_company_links(html)
+            page_count = parse_page_count(html)
+            if page_count is None:
+                page_num = 1
+                while pages[page_num]:
+                    page_num += 1
+                    pages[page_num] = parse_company_links(read(page_num))
+            pages_list = range(2, (page_count or 1) + 1)
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            for page_num, html in zip(pages_list, executor.map(read, pages_list)):
+                pages[page_num] = parse_company_links(html)
+    finally:
+        session.close()
+
+    links = dedupe_links(link for page_num in sorted(pages) for link in pages[page_num])
+    print(f"🔗 {len(links)} company links on {len(pages)} listing page(s)")
+    return links
+
+def iter_company_details(links, num_workers=DETAIL_WORKERS, requests_per_second=DETAIL_RATE, rate_controller=None, cache=None, timeout=PAGE_TIMEOUT, progress_callback=None, run_stats=None, metrics_sinks=()):
+    """
+    Fetch and parse company pages concurrently, yielding (url, company, tables) as each finishes
+
+    Pages that fail on every attempt are not yielded; they are listed in
+    run_stats['failed']. A login redirect switches to newer cookies if there
+    are any, and otherwise stops the crawl (run_stats['login_expired']).
+    progress_callback(completed, total) is called from the consuming thread.
+    Closing the generator early cancels the pages that haven't started.
+
+    Args: see crawl_company_details
+    """
+    urls = links if isinstance(links, dict) else dedupe_links(links)
+    if rate_controller is not None:
+        num_workers = rate_controller.max_concurrency
+    num_workers = max(1, min(num_workers, len(urls)))
+    bucket = TokenBucket(requests_per_second) if rate_controller is None else None
+    session = init_session(pool_size=num_workers)
+    sessions = get_session_manager()
+    metrics = RunMetrics(metrics_sinks)
+    stop = Event()
+
+    def crawl(url, company):
+        worker = metrics.for_worker(current_thread().name)
+        error = None
+        for attempt in range(MAX_PAGE_ATTEMPTS):
+            if stop.is_set():
+                return None
+            if attempt:
+                worker.count('retries')
+            try:
+                sessions.sync(session)
+                html, from_cache = fetch_html(session, url, cache, rate_controller, bucket, timeout, worker)
+                with span(worker, 'parse', url):
+                    page_company, tables = parse_company_page(html)
+                worker.count('pages')
+                return company or page_company, tables, from_cache
+            except Exception as e:
+                print(f"Error on {url} (attempt {attempt + 1}/{MAX_PAGE_ATTEMPTS}): {e}")
+                worker.count('errors')
+                error = e
+                if isinstance(e, LoginRequired):
+                    if sessions.handle_expiry(session):
+                        continue
+                    # Every other page would be redirected too
+                    stop.set()
+                    raise
+                if attempt + 1 < MAX_PAGE_ATTEMPTS:
+                    with span(worker, 'backoff', url):
+                        time.sleep(rate_controller.backoff_time() if rate_controller else ERROR_BACKOFF)
+        raise error
+
+    total = len(urls)
+    completed = 0
+    cache_hits = 0
+    failed = {}
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='detail')
+    print(f"\n🏢 Crawling {total} company pages with {num_workers} thread(s)...")
+
+    try:
+        futures = {executor.submit(crawl, url, company): url for url, company in urls.items()}
+        for future in as_completed(futures):
+            url = futures[future]
+            completed += 1
+            try:
+                result = future.result()
+            except Exception as e:
+                failed[url] = str(e)
+                result = None
+            if progress_callback:
+                progress_callback(completed, total)
+            if result is not None:
+                company, tables, from_cache = result
+                cache_hits += from_cache
+                yield url, company, tables
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        session.close()
+        elapsed = time.monotonic() - started
+        timings = metrics.close()
+        fetched = sum(stats['pages'] for stats in timings['workers'].values())
+        print(f"✅ {fetched}/{total} company pages in {elapsed:.1f}s ({fetched / elapsed if elapsed else 0.0:.2f}/s), "
+              f"{cache_hits} from cache, {len(failed)} failed")
+        if timings['phases']:
+            print("Time by phase:\n" + format_summary(timings))
+        if rate_controller is not None:
+            rate_controller.save()
+        if run_stats is not None:
+            run_stats.update({
+                'elapsed': elapsed,
+                'pages': fetched,
+                'cache_hits': cache_hits,
+                'pages_per_sec': fetched / elapsed if elapsed else 0.0,
+                'failed': failed,
+                'phases': timings['phases'],
+                'workers': timings['workers'],
+                'login_expired': sessions.login_expired(),
+            })
+
+def crawl_company_details(links=None, pages_list=None, num_workers=DETAIL_WORKERS, requests_per_second=DETAIL_RATE, rate_controller=None, cache=None, timeout=PAGE_TIMEOUT, progress_callback=None, run_stats=None, metrics_sinks=()):
+    """
+    Full history for every company on the listing, from the companies' own pages
+
+    Args:
+        links: {url: company} or (company, href) pairs, e.g. from
+            record_links on the scraped records. None reads them from the
+            listing pages (see listing_links).
+        pages_list: Listing pages to take links from when links is None
+            (None: the whole listing)
+        num_workers: Threads fetching pages; requests still go out no faster
+            than the rate limit allows
+        requests_per_second: Global request rate when there is no rate_controller
+        rate_controller: Optional AdaptiveRateController shared with the
+            listing scrape. Replaces num_workers and requests_per_second
+        cache: Optional PageCache for company (and listing) pages, keyed by URL
+        timeout: Seconds per request
+        progress_callback: Callback function(completed, total)
+        run_stats: Optional dict, filled with pages/s, cache hits, failed
+            URLs, time per phase and per-thread counts
+        metrics_sinks: metrics.MetricsSink instances receiving every span
+
+    Returns:
+        {'quarters', 'balance_sheet', 'ratios'}: long DataFrames, see
+        company_parser.DETAIL_TABLES for their columns
+    """
+    if links is None:
+        links = listing_links(pages_list, cache=cache, num_workers=num_workers, requests_per_second=requests_per_second,
+                              rate_controller=rate_controller, timeout=timeout)
+
+    builder = DetailBuilder()
+    for _, company, tables in iter_company_details(
+        links,
+        num_workers=num_workers,
+        requests_per_second=requests_per_second,
+        rate_controller=rate_controller,
+        cache=cache,
+        timeout=timeout,
+        progress_callback=progress_callback,
+        run_stats=run_stats,
+        metrics_sinks=metrics_sinks
+    ):
+        builder.extend(company, tables)
+    return builder.to_frames()
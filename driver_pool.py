@@ -0,0 +1,217 @@
+"""
+Process-wide pool of warm headless Chrome drivers
+
+Starting Chrome, installing the driver and applying cookies costs several
+seconds, so drivers are created once and lent out to login checks and scrape
+workers. A driver is health-checked whenever it is lent out, and recycled after
+a number of pages or once its JS heap grows too large.
+"""
+
+import atexit
+import time
+from threading import Condition, Lock, Thread
+
+DEFAULT_MIN_SIZE = 1
+DEFAULT_MAX_SIZE = 3
+MAX_PAGES_PER_DRIVER = 50
+MAX_HEAP_MB = 512
+IDLE_TIMEOUT = 10 * 60  # Idle drivers above min_size are quit after this many seconds
+
+class DriverPool:
+    """
+    Args:
+        factory: Callable returning a new, cookie-loaded driver
+        min_size: Drivers kept warm even when idle
+        max_size: Maximum drivers alive at once; borrowers wait beyond this
+        max_pages: Pages a driver serves before it is replaced
+        max_heap_mb: JS heap size (performance.memory) above which a driver is replaced
+    """
+    def __init__(self, factory, min_size=DEFAULT_MIN_SIZE, max_size=DEFAULT_MAX_SIZE,
+                 max_pages=MAX_PAGES_PER_DRIVER, max_heap_mb=MAX_HEAP_MB):
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.max_pages = max_pages
+        self.max_heap_mb = max_heap_mb
+        self._idle = []    # [(driver, idle_since)]
+        self._pages = {}   # id(driver) -> pages served
+        self._size = 0     # drivers alive, idle or lent out
+        self._warming = 0  # drivers being started by prewarm()
+        self._cond = Condition(Lock())
+
+    def _create(self):
+        """Create a driver for a slot already counted in self._size"""
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._pages[id(driver)] = 0
+        return driver
+
+    def _quit(self, driver):
+        """Quit a driver, leaving its slot counted in self._size"""
+        self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error quitting pooled driver: {e}")
+
+    def _destroy(self, driver):
+        self._quit(driver)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def is_healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def heap_mb(self, driver):
+        try:
+            used = driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0"
+            )
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def needs_recycle(self, driver):
+        return (
+            self._pages.get(id(driver), 0) >= self.max_pages
+            or self.heap_mb(driver) > self.max_heap_mb
+        )
+
+    def ensure_capacity(self, size):
+        """Allow at least `size` drivers (e.g. one per scrape worker)"""
+        with self._cond:
+            if size > self.max_size:
+                self.max_size = size
+                self._cond.notify_all()
+
+    def prewarm(self, count=None, background=True):
+        """Start drivers until `count` (default min_size) are alive"""
+        target = min(count if count is not None else self.min_size, self.max_size)
+
+        def warm():
+            while True:
+                with self._cond:
+                    if self._size >= target:
+                        return
+                    self._size += 1
+                    self._warming += 1
+                try:
+                    driver = self._create()
+                except Exception as e:
+                    print(f"Driver pre-warm failed: {e}")
+                    with self._cond:
+                        self._warming -= 1
+                        self._cond.notify_all()
+                    return
+                with self._cond:
+                    # Idle before it stops counting as warming, so no borrower starts another meanwhile
+                    self._idle.append((driver, time.monotonic()))
+                    self._warming -= 1
+                    self._cond.notify_all()
+
+        if background:
+            Thread(target=warm, daemon=True).start()
+        else:
+            warm()
+
+    def _put_idle(self, driver):
+        with self._cond:
+            self._idle.append((driver, time.monotonic()))
+            self._cond.notify()
+
+    def _reap_idle(self):
+        """Quit drivers above min_size that have sat idle past IDLE_TIMEOUT"""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            while len(self._idle) > self.min_size and now - self._idle[0][1] > IDLE_TIMEOUT:
+                expired.append(self._idle.pop(0)[0])
+        for driver in expired:
+            self._destroy(driver)
+
+    def acquire(self, timeout=None):
+        """Borrow a healthy driver, starting one if the pool has room and none is warming up"""
+        deadline = time.monotonic() + timeout if timeout else None
+        self._reap_idle()
+
+        while True:
+            with self._cond:
+                while not self._idle and (self._size >= self.max_size or self._warming):
+                    remaining = deadline - time.monotonic() if deadline else None
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No pooled driver available")
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    # Most recently used first: it is the warmest
+                    driver = self._idle.pop()[0]
+                else:
+                    self._size += 1
+                    driver = None
+
+            if driver is None:
+                return self._create()
+            if self.is_healthy(driver):
+                return driver
+            print("Discarding unhealthy pooled driver")
+            self._destroy(driver)
+
+    def release(self, driver, broken=False):
+        """Return a borrowed driver; broken or worn-out drivers are replaced"""
+        if broken or not self.is_healthy(driver) or self.needs_recycle(driver):
+            self._destroy(driver)
+            self.prewarm()
+        else:
+            self._put_idle(driver)
+
+    def checkpoint(self, driver, pages=1):
+        """
+        Record pages served by a borrowed driver
+
+        Returns the driver to keep using: the same one, or a fresh replacement
+        if it crashed or is due for recycling. The replacement takes over the
+        old driver's slot; if it can't be started the slot is given back and
+        the error raised. The old driver is gone either way, so the caller must
+        neither use nor release it after an error.
+        """
+        self._pages[id(driver)] = self._pages.get(id(driver), 0) + pages
+        if self.is_healthy(driver) and not self.needs_recycle(driver):
+            return driver
+        print("Recycling pooled driver")
+        self._quit(driver)
+        return self._create()
+
+    def shutdown(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._destroy(driver)
+
+_pools = {}
+_pool_lock = Lock()
+
+def get_pool(factory, name='default', **kwargs):
+    """
+    Return the process-wide pool called `name`, creating it on first use
+
+    Drivers configured differently (e.g. the lean browser profile) live in
+    separate pools so a borrower always gets the kind it asked for.
+    """
+    with _pool_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = DriverPool(factory, **kwargs)
+            atexit.register(pool.shutdown)
+            # Start the warm drivers now; the first borrower takes one as soon as it is up
+            pool.prewarm()
+        return pool
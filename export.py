@@ -0,0 +1,109 @@
+"""
+Export result frames to CSV, gzip-CSV, Parquet or Arrow IPC
+
+Frames are written in row chunks, so a large history never needs a second
+full-size text copy in memory. Finished exports are kept in a small in-memory
+cache keyed by a fingerprint of the dataset and filters, so repeated downloads
+of the same view are served without serializing again.
+"""
+
+import gzip
+import hashlib
+import io
+from collections import OrderedDict
+from threading import Lock
+
+CHUNK_ROWS = 50_000
+CACHE_ENTRIES = 4
+
+# format -> (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('CSV', '.csv', 'text/csv'),
+    'csv.gz': ('CSV (gzip)', '.csv.gz', 'application/gzip'),
+    'parquet': ('Parquet', '.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('Arrow IPC', '.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+def iter_chunks(df, chunk_rows=CHUNK_ROWS):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def _write_csv(df, out, chunk_rows):
+    for index, chunk in enumerate(iter_chunks(df, chunk_rows)):
+        out.write(chunk.to_csv(index=False, header=index == 0).encode('utf-8'))
+
+def _arrow_batches(df, chunk_rows):
+    import pyarrow as pa
+    for chunk in iter_chunks(df, chunk_rows):
+        yield pa.Table.from_pandas(chunk, preserve_index=False)
+
+def _write_parquet(df, out, chunk_rows):
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for table in _arrow_batches(df, chunk_rows):
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema, compression='zstd')
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def _write_arrow(df, out, chunk_rows):
+    import pyarrow as pa
+    writer = None
+    try:
+        for table in _arrow_batches(df, chunk_rows):
+            if writer is None:
+                writer = pa.ipc.new_file(out, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def write_export(df, fmt, out, chunk_rows=CHUNK_ROWS):
+    """Write df to a binary file object in the given format, chunk by chunk"""
+    if fmt == 'csv':
+        _write_csv(df, out, chunk_rows)
+    elif fmt == 'csv.gz':
+        with gzip.GzipFile(fileobj=out, mode='wb') as gz:
+            _write_csv(df, gz, chunk_rows)
+    elif fmt == 'parquet':
+        _write_parquet(df, out, chunk_rows)
+    elif fmt == 'arrow':
+        _write_arrow(df, out, chunk_rows)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {tuple(EXPORT_FORMATS)}")
+
+def export_bytes(df, fmt, chunk_rows=CHUNK_ROWS):
+    buffer = io.BytesIO()
+    write_export(df, fmt, buffer, chunk_rows)
+    return buffer.getvalue()
+
+def fingerprint(*parts):
+    """Stable key for a dataset version plus filter settings"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+_cache = OrderedDict()
+_cache_lock = Lock()
+
+def cached_export(make_frame, fmt, key):
+    """
+    Export bytes for (key, fmt), building them only on a cache miss
+
+    make_frame is only called on a miss, so callers can defer even the row
+    selection until a download is actually requested.
+    """
+    cache_key = (key, fmt)
+    with _cache_lock:
+        if cache_key in _cache:
+            _cache.move_to_end(cache_key)
+            return _cache[cache_key]
+
+    data = export_bytes(make_frame(), fmt)
+
+    with _cache_lock:
+        _cache[cache_key] = data
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return data
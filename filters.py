@@ -0,0 +1,145 @@
+"""
+Vectorized screen filters
+
+All predicates are combined into one boolean mask computed over the column
+arrays, so filtering never builds intermediate DataFrames. Callers index the
+frame once with the resulting row positions.
+"""
+
+import numpy as np
+import pandas as pd
+from name_index import NameIndex
+
+def name_mask(column, search):
+    """Rows whose name contains `search` (case-insensitive), as a boolean array"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Match each distinct name once, then broadcast to rows through the codes
+        categories = pd.Series(column.cat.categories, dtype=object)
+        matches = categories.str.contains(search, case=False, na=False, regex=False).to_numpy()
+        codes = column.cat.codes.to_numpy()
+        return np.append(matches, False)[codes]  # code -1 (missing) indexes the trailing False
+    return column.str.contains(search, case=False, na=False, regex=False).to_numpy(dtype=bool)
+
+def dtype_bounds(dtype, low, high):
+    """
+    (low, high) as scalars of a float dtype, rounded inwards
+
+    A value of that dtype lies within them exactly when it lies within the
+    original bounds, so comparisons need no upcast of the column and give the
+    same rows whatever the bounds' own type.
+    """
+    dtype = np.dtype(dtype).type
+    low_bound, high_bound = dtype(low), dtype(high)
+    if np.float64(low_bound) < np.float64(low):
+        low_bound = np.nextafter(low_bound, dtype(np.inf))
+    if np.float64(high_bound) > np.float64(high):
+        high_bound = np.nextafter(high_bound, dtype(-np.inf))
+    return low_bound, high_bound
+
+def filter_mask(df, company_search='', ranges=None):
+    """
+    Boolean mask for a company-name search plus {column: (min, max)} ranges
+
+    Range bounds are inclusive and rows missing a value are kept, so a filter
+    never hides companies that simply didn't report a metric.
+    """
+    mask = np.ones(len(df), dtype=bool)
+
+    if company_search and 'Company' in df.columns:
+        mask &= name_mask(df['Company'], company_search)
+
+    for column, (low, high) in (ranges or {}).items():
+        if column not in df.columns:
+            continue
+        values = df[column].to_numpy()
+        if values.dtype.kind != 'f':
+            values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        low, high = dtype_bounds(values.dtype, low, high)
+        with np.errstate(invalid='ignore'):
+            in_range = (values >= low) & (values <= high)
+        mask &= in_range | np.isnan(values)
+
+    return mask
+
+def filter_positions(df, company_search='', ranges=None):
+    """Row positions passing the filters, in frame order"""
+    return np.flatnonzero(filter_mask(df, company_search, ranges))
+
+class SortedIndex:
+    """
+    Sorted view of one numeric column for range lookups
+
+    `rank[row]` is the row's position in sorted order (-1 for missing values),
+    so a range found with searchsorted can be tested against any candidate row
+    in O(1) without touching the column again.
+    """
+    def __init__(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind != 'f':
+            values = values.astype(np.float64)
+        present = np.flatnonzero(~np.isnan(values))
+        order = present[np.argsort(values[present], kind='stable')]
+        self.sorted_values = values[order]
+        self.order = order
+        self.rank = np.full(len(values), -1, dtype=np.int32)
+        self.rank[order] = np.arange(len(order), dtype=np.int32)
+        self.missing = np.flatnonzero(np.isnan(values))
+
+    def bounds(self, low, high):
+        """[start, stop) slice of sorted order holding low <= value <= high"""
+        # Bounds in the column's dtype, as filter_mask uses them (a float64 bound would upcast the array)
+        low_bound, high_bound = dtype_bounds(self.sorted_values.dtype, low, high)
+        start = int(np.searchsorted(self.sorted_values, low_bound, side='left'))
+        stop = int(np.searchsorted(self.sorted_values, high_bound, side='right'))
+        return start, max(start, stop)
+
+    def positions(self, low, high):
+        """Rows in the range plus rows missing a value (unsorted)"""
+        start, stop = self.bounds(low, high)
+        return np.concatenate([self.order[start:stop], self.missing])
+
+class ScreenIndex:
+    """
+    Sorted indexes over a frame's numeric columns, built once per dataset
+
+    Answers the same range queries as filter_positions: the most selective
+    range supplies the candidate rows and the other ranges are checked against
+    them by rank, so the cost follows the size of the result, not of the frame.
+    Company searches go through a NameIndex, which adds a fuzzy fallback when
+    no name contains the search text.
+    """
+    def __init__(self, df, columns):
+        self.df = df
+        self.indexes = {column: SortedIndex(df[column].to_numpy()) for column in columns if column in df.columns}
+        self.names = NameIndex.from_column(df['Company']) if 'Company' in df.columns else None
+
+    def positions(self, company_search='', ranges=None):
+        bounds = {}
+        for column, (low, high) in (ranges or {}).items():
+            if column in self.indexes:
+                start, stop = self.indexes[column].bounds(low, high)
+                # A range covering every value filters nothing
+                if start > 0 or stop < len(self.indexes[column].sorted_values):
+                    bounds[column] = (start, stop)
+        unindexed = {column: value for column, value in (ranges or {}).items() if column not in self.indexes}
+
+        if bounds:
+            # Start from the range matching the fewest rows
+            column = min(bounds, key=lambda col: bounds[col][1] - bounds[col][0] + len(self.indexes[col].missing))
+            start, stop = bounds.pop(column)
+            index = self.indexes[column]
+            candidates = np.sort(np.concatenate([index.order[start:stop], index.missing]))
+            for column, (start, stop) in bounds.items():
+                rank = self.indexes[column].rank[candidates]
+                candidates = candidates[((rank >= start) & (rank < stop)) | (rank < 0)]
+        else:
+            candidates = None
+
+        if company_search and self.names is not None:
+            rows = self.names.rows(company_search)
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+        if candidates is None:
+            candidates = np.arange(len(self.df))
+        if unindexed:
+            candidates = candidates[filter_mask(self.df.iloc[candidates], '', unindexed)]
+        return candidates
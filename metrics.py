@@ -0,0 +1,255 @@
+"""
+Timing spans and per-worker counters for scrape runs
+
+Every page is broken into phases (driver acquisition, throttling, navigation,
+readiness wait, page_source transfer or DOM extraction, parse, deliberate sleep) and each phase
+is timed as a span. Workers also count pages, errors and retries. Spans are
+forwarded to pluggable sinks as they happen, and summarized at the end of the
+run, so a slow run can be pinned on the network, Chrome, parsing or our own
+sleeps.
+
+Sinks:
+    JsonLinesSink: one JSON object per span, plus the summary when the run ends
+    PrometheusSink: Prometheus text exposition format, written to a file at the
+        end of the run and/or served live on an HTTP port
+"""
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+import numpy as np
+
+METRICS_FILE = 'screener_metrics.jsonl'
+PROMETHEUS_FILE = 'screener_metrics.prom'
+
+# Phases, in the order a page goes through them
+PHASES = ('acquire', 'cache', 'throttle', 'navigate', 'wait', 'transfer', 'extract', 'fetch', 'handoff', 'parse', 'sleep', 'backoff')
+PHASE_LABELS = {
+    'acquire': 'Driver acquisition',
+    'throttle': 'Rate-limit wait',
+    'navigate': 'Navigation',
+    'wait': 'Readiness wait',
+    'transfer': 'page_source transfer',
+    'extract': 'DOM extraction',
+    'fetch': 'HTTP request',
+    'cache': 'Cache lookup',
+    'handoff': 'Parse queue wait',
+    'parse': 'Parse',
+    'sleep': 'Delay between pages',
+    'backoff': 'Error backoff',
+}
+COUNTERS = ('pages', 'errors', 'retries', 'bytes')  # bytes: transferred by the browser, where measured
+
+class MetricsSink:
+    """Base class for sinks: receives every span as it ends and the summary when the run ends"""
+    def attach(self, metrics):
+        pass
+
+    def record(self, event):
+        pass
+
+    def close(self, summary):
+        pass
+
+class JsonLinesSink(MetricsSink):
+    def __init__(self, path=METRICS_FILE):
+        self.path = path
+        self._lock = Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, event):
+        with self._lock:
+            self._file.write(json.dumps(event) + '\n')
+            self._file.flush()
+
+    def record(self, event):
+        self._write(event)
+
+    def close(self, summary):
+        self._write({'event': 'summary', 'time': time.time(), **summary})
+        with self._lock:
+            self._file.close()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text(self.server.metrics.summary()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+# port -> running server; later runs take over the endpoint instead of binding the port again
+_servers = {}
+_servers_lock = Lock()
+
+class PrometheusSink(MetricsSink):
+    """
+    Args:
+        path: Text-format file written when the run ends (for node_exporter's
+            textfile collector, or just to read). None to skip.
+        port: If set, serve the current run's metrics on
+            http://localhost:<port>/metrics for as long as the process runs
+    """
+    def __init__(self, path=PROMETHEUS_FILE, port=None):
+        self.path = path
+        self.port = port
+
+    def attach(self, metrics):
+        if self.port is None:
+            return
+        with _servers_lock:
+            server = _servers.get(self.port)
+            if server is None:
+                server = _servers[self.port] = ThreadingHTTPServer(('', self.port), _MetricsHandler)
+                Thread(target=server.serve_forever, daemon=True).start()
+                print(f"📈 Serving metrics on http://localhost:{self.port}/metrics")
+            server.metrics = metrics
+
+    def close(self, summary):
+        # The endpoint keeps serving the final numbers until the next run takes it over
+        if self.path:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(prometheus_text(summary))
+
+class RunMetrics:
+    """
+    Thread-safe collector for one scrape run
+
+    Args:
+        sinks: MetricsSink instances fed with every span and the final summary
+    """
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.started = time.monotonic()
+        self._lock = Lock()
+        self._durations = defaultdict(list)  # phase -> [seconds]
+        self._counters = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))  # worker -> counts
+        self._worker_time = {}
+        self._summary = None
+        for sink in self.sinks:
+            sink.attach(self)
+
+    def record(self, phase, seconds, worker=None, page=None):
+        with self._lock:
+            self._durations[phase].append(seconds)
+        if self.sinks:
+            event = {'event': 'span', 'time': time.time(), 'phase': phase, 'seconds': round(seconds, 6), 'worker': worker, 'page': page}
+            for sink in self.sinks:
+                sink.record(event)
+
+    @contextmanager
+    def span(self, phase, worker=None, page=None):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(phase, time.monotonic() - started, worker, page)
+
+    def count(self, worker, counter, amount=1):
+        with self._lock:
+            self._counters[worker][counter] += amount
+
+    def worker_finished(self, worker, wall_time):
+        with self._lock:
+            self._worker_time[worker] = wall_time
+
+    def for_worker(self, worker):
+        return WorkerMetrics(self, worker)
+
+    def summary(self):
+        """{'elapsed', 'phases': {phase: stats}, 'workers': {worker: counts and pages_per_sec}}"""
+        with self._lock:
+            durations = {phase: np.array(values) for phase, values in self._durations.items()}
+            counters = {worker: dict(counts) for worker, counts in self._counters.items()}
+            worker_time = dict(self._worker_time)
+        elapsed = time.monotonic() - self.started
+
+        phases = {}
+        for phase in sorted(durations, key=lambda p: PHASES.index(p) if p in PHASES else len(PHASES)):
+            values = durations[phase]
+            phases[phase] = {
+                'count': len(values),
+                'total': float(values.sum()),
+                'mean': float(values.mean()),
+                'p50': float(np.percentile(values, 50)),
+                'p95': float(np.percentile(values, 95)),
+                'max': float(values.max()),
+            }
+        workers = {}
+        for worker, counts in sorted(counters.items(), key=lambda item: str(item[0])):
+            wall_time = worker_time.get(worker, elapsed)
+            workers[worker] = {**counts, 'pages_per_sec': counts['pages'] / wall_time if wall_time else 0.0}
+        return {'elapsed': elapsed, 'phases': phases, 'workers': workers}
+
+    def close(self):
+        """Summarize the run, hand the summary to every sink and return it (only the first call closes the sinks)"""
+        if self._summary is not None:
+            return self._summary
+        summary = self._summary = self.summary()
+        for sink in self.sinks:
+            try:
+                sink.close(summary)
+            except Exception as e:
+                print(f"Metrics sink {type(sink).__name__} failed: {e}")
+        return summary
+
+class WorkerMetrics:
+    """RunMetrics bound to one worker, passed down to the fetch functions"""
+    def __init__(self, metrics, worker):
+        self.metrics = metrics
+        self.worker = worker
+
+    def span(self, phase, page=None):
+        return self.metrics.span(phase, self.worker, page)
+
+    def count(self, counter, amount=1):
+        self.metrics.count(self.worker, counter, amount)
+
+    def finished(self, wall_time):
+        self.metrics.worker_finished(self.worker, wall_time)
+
+def span(metrics, phase, page=None):
+    """metrics.span(phase, page) for a WorkerMetrics, or a no-op when metrics is None"""
+    if metrics is None:
+        return nullcontext()
+    return metrics.span(phase, page)
+
+def format_summary(summary):
+    """One line per phase, largest total first, for the console"""
+    lines = []
+    for phase, stats in sorted(summary['phases'].items(), key=lambda item: -item[1]['total']):
+        lines.append(
+            f"  {PHASE_LABELS.get(phase, phase):<22} {stats['total']:8.2f}s total  "
+            f"{stats['count']:5d} × {stats['mean'] * 1000:7.1f} ms  (p95 {stats['p95'] * 1000:.1f} ms)"
+        )
+    return '\n'.join(lines)
+
+def prometheus_text(summary):
+    """Prometheus text exposition format for a RunMetrics summary"""
+    lines = [
+        '# HELP screener_run_seconds Wall time of the scrape run',
+        '# TYPE screener_run_seconds gauge',
+        f"screener_run_seconds {summary['elapsed']:.6f}",
+        '# HELP screener_phase_seconds Time spent per page phase',
+        '# TYPE screener_phase_seconds summary',
+    ]
+    for phase, stats in summary['phases'].items():
+        lines.append(f'screener_phase_seconds{{phase="{phase}",quantile="0.5"}} {stats["p50"]:.6f}')
+        lines.append(f'screener_phase_seconds{{phase="{phase}",quantile="0.95"}} {stats["p95"]:.6f}')
+        lines.append(f'screener_phase_seconds_sum{{phase="{phase}"}} {stats["total"]:.6f}')
+        lines.append(f'screener_phase_seconds_count{{phase="{phase}"}} {stats["count"]}')
+    for counter in COUNTERS:
+        lines.append(f'# TYPE screener_worker_{counter}_total counter')
+        for worker, stats in summary['workers'].items():
+            lines.append(f'screener_worker_{counter}_total{{worker="{worker}"}} {stats[counter]}')
+    lines.append('# TYPE screener_worker_pages_per_second gauge')
+    for worker, stats in summary['workers'].items():
+        lines.append(f'screener_worker_pages_per_second{{worker="{worker}"}} {stats["pages_per_sec"]:.6f}')
+    return '\n'.join(lines) + '\n'
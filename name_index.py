@@ -0,0 +1,195 @@
+"""
+Company-name index for search and autocomplete
+
+Built once per dataset over the distinct company names. Substring queries are
+answered from trigram postings, prefixes from sorted name and word lists, and
+queries with no literal match fall back to a fuzzy trigram ranking, so
+"infosys ltd" or "infosis" still find "Infosys". Matches map back to frame rows
+through the Company category codes.
+"""
+
+import bisect
+import re
+from collections import Counter, defaultdict
+import numpy as np
+import pandas as pd
+
+# Words ignored when comparing names loosely ("Infosys Ltd" ~ "Infosys")
+NAME_SUFFIXES = {'ltd', 'limited', 'inc', 'corp', 'corporation', 'co', 'company', 'pvt', 'private', 'plc'}
+FUZZY_THRESHOLD = 0.5  # Minimum trigram (Dice) similarity for a fuzzy match, averaged over the query's words
+
+def fold(text):
+    """Lowercase with whitespace collapsed; substring matching works on this"""
+    return ' '.join(str(text).lower().split())
+
+def core(text):
+    """Alphanumeric words without legal suffixes; fuzzy matching works on this"""
+    words = re.findall(r'[a-z0-9]+', str(text).lower())
+    kept = [word for word in words if word not in NAME_SUFFIXES]
+    return ' '.join(kept or words)
+
+def trigrams(text, pad=False):
+    if pad:
+        text = f' {text} '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class NameIndex:
+    """
+    Args:
+        names: Distinct company names
+        codes: Optional array mapping each frame row to an index into names
+            (-1 for missing), e.g. a categorical column's codes
+    """
+    def __init__(self, names, codes=None):
+        self.names = [str(name) for name in names]
+        self.folded = [fold(name) for name in self.names]
+        self.cores = [core(name) for name in self.names]
+
+        self._substring_postings = defaultdict(set)
+        self._fuzzy_postings = defaultdict(set)
+        # Fuzzy matching compares words, so a typo in one word of a long name still scores
+        self._core_words = {}               # word -> word id
+        self._word_names = []               # word id -> name ids
+        self._word_postings = defaultdict(set)
+        words = []
+        for name_id, (folded, name_core) in enumerate(zip(self.folded, self.cores)):
+            for gram in trigrams(folded):
+                self._substring_postings[gram].add(name_id)
+            for gram in trigrams(name_core, pad=True):
+                self._fuzzy_postings[gram].add(name_id)
+            for word in set(name_core.split()):
+                word_id = self._core_words.get(word)
+                if word_id is None:
+                    word_id = self._core_words[word] = len(self._word_names)
+                    self._word_names.append(set())
+                    for gram in trigrams(word, pad=True):
+                        self._word_postings[gram].add(word_id)
+                self._word_names[word_id].add(name_id)
+            words.extend((word, name_id) for word in set(folded.split()))
+        self._sorted_names = sorted((folded, name_id) for name_id, folded in enumerate(self.folded))
+        self._sorted_words = sorted(words)
+        self._word_sizes = [0] * len(self._word_names)
+        for word, word_id in self._core_words.items():
+            self._word_sizes[word_id] = len(trigrams(word, pad=True))
+
+        self._row_order = None
+        if codes is not None:
+            codes = np.asarray(codes)
+            self._row_order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[self._row_order]
+            ids = np.arange(len(self.names))
+            self._row_starts = np.searchsorted(sorted_codes, ids, side='left')
+            self._row_stops = np.searchsorted(sorted_codes, ids, side='right')
+
+    @classmethod
+    def from_column(cls, column):
+        """Index a Company column (categorical or plain strings)"""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return cls(column.cat.categories, column.cat.codes.to_numpy())
+        codes, names = pd.factorize(column)
+        return cls(names, codes)
+
+    def _prefixed(self, entries, prefix):
+        """Name ids whose entry in a sorted (text, id) list starts with prefix"""
+        ids = []
+        for position in range(bisect.bisect_left(entries, (prefix, -1)), len(entries)):
+            text, name_id = entries[position]
+            if not text.startswith(prefix):
+                break
+            ids.append(name_id)
+        return ids
+
+    def _containing(self, query, texts=None, postings=None):
+        """Name ids whose text (folded names by default) contains query"""
+        texts = self.folded if texts is None else texts
+        postings = self._substring_postings if postings is None else postings
+        grams = trigrams(query)
+        if not grams:
+            # Too short for trigrams; the distinct-name list is small enough to scan
+            return [name_id for name_id, text in enumerate(texts) if query in text]
+        candidates = set.intersection(*sorted((postings.get(gram, set()) for gram in grams), key=len))
+        return sorted(name_id for name_id in candidates if query in texts[name_id])
+
+    def _fuzzy(self, query, threshold=FUZZY_THRESHOLD):
+        """
+        (name_id, score) pairs by trigram similarity, best first
+
+        Each word of the query's core is scored against its most similar word
+        in a name (Dice over padded trigrams), and a name's score is the mean
+        over the query's words, so "infosis" finds "Tech Infosys Limited".
+        """
+        query_words = core(query).split()
+        if not query_words:
+            return []
+        totals = Counter()
+        for query_word in query_words:
+            grams = trigrams(query_word, pad=True)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._word_postings.get(gram, ()))
+            best = {}
+            for word_id, count in shared.items():
+                score = 2 * count / (len(grams) + self._word_sizes[word_id])
+                for name_id in self._word_names[word_id]:
+                    if score > best.get(name_id, 0.0):
+                        best[name_id] = score
+            totals.update(best)
+        scored = [(name_id, total / len(query_words)) for name_id, total in totals.items()]
+        return sorted(
+            ((name_id, score) for name_id, score in scored if score >= threshold),
+            key=lambda item: (-item[1], len(self.names[item[0]]))
+        )
+
+    def match(self, query):
+        """
+        Name ids matching a search, and whether the match is exact
+
+        A name matches if it contains the query (case-insensitive). If none
+        does, names whose cores contain the query's core, then names that are
+        fuzzily similar, are returned with exact=False.
+        """
+        query = fold(query)
+        if not query:
+            return list(range(len(self.names))), True
+        ids = self._containing(query)
+        if ids:
+            return ids, True
+        query_core = core(query)
+        # Padded core trigrams include every unpadded one, so they serve for containment too
+        ids = self._containing(query_core, self.cores, self._fuzzy_postings) if query_core else []
+        if ids:
+            return ids, False
+        return sorted(name_id for name_id, _ in self._fuzzy(query)), False
+
+    def rows(self, query):
+        """Frame row positions (sorted) of the names matching a search"""
+        if self._row_order is None:
+            raise ValueError("NameIndex was built without row codes")
+        ids, _ = self.match(query)
+        if not ids:
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate([self._row_order[self._row_starts[i]:self._row_stops[i]] for i in ids])
+        return np.sort(rows)
+
+    def suggest(self, query, limit=8):
+        """Autocomplete: names starting with the query, then with a word starting with it, then containing it, then similar"""
+        query = fold(query)
+        if not query:
+            return []
+        ranked = []
+        seen = set()
+        # Later tiers are only computed if the earlier ones don't fill the list
+        tiers = (
+            lambda: self._prefixed(self._sorted_names, query),
+            lambda: self._prefixed(self._sorted_words, query),
+            lambda: self._containing(query),
+            lambda: [name_id for name_id, _ in self._fuzzy(query)],
+        )
+        for tier in tiers:
+            for name_id in tier():
+                if name_id not in seen:
+                    seen.add(name_id)
+                    ranked.append(self.names[name_id])
+                    if len(ranked) >= limit:
+                        return ranked
+        return ranked
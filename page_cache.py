@@ -0,0 +1,148 @@
+"""
+On-disk cache for fetched pages
+
+Entries are keyed by a SHA-256 of the page URL. Each entry is a gzip-compressed
+body plus a small JSON sidecar holding the URL, fetch time and the validators
+(ETag / Last-Modified) needed for conditional revalidation. The body file's
+mtime doubles as the last-access time for LRU eviction.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from threading import Lock
+
+CACHE_DIR = '.screener_cache'
+DEFAULT_TTL = 15 * 60  # seconds
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+class PageCache:
+    """
+    Size-bounded, TTL-based page cache
+
+    Args:
+        cache_dir: Directory holding the cache entries
+        ttl: Seconds an entry is served without contacting the server
+        max_bytes: Compressed size above which least-recently-used entries are evicted
+    """
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + '.html.gz', base + '.json'
+
+    def _scan(self):
+        """Yield (body_path, size, last_access) for every entry"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.html.gz'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def get(self, url):
+        """Return the cached entry for url (fresh or stale), or None"""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                entry['body'] = gzip.decompress(f.read()).decode('utf-8')
+            os.utime(body_path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry['stored_at'] < self.ttl
+
+    def get_fresh(self, url):
+        """Return the cached body if it is still within the TTL, else None"""
+        entry = self.get(url)
+        return entry['body'] if self.is_fresh(entry) else None
+
+    def conditional_headers(self, entry):
+        """Headers to revalidate a stale entry with the server"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None):
+        body_path, meta_path = self._paths(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        data = gzip.compress(body.encode('utf-8'))
+        meta = {
+            'url': url,
+            'stored_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+
+        with self._lock:
+            old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+            # Write to temp files and swap in, so readers never see a partial entry
+            with open(body_path + '.tmp', 'wb') as f:
+                f.write(data)
+            with open(meta_path + '.tmp', 'w') as f:
+                json.dump(meta, f)
+            os.replace(body_path + '.tmp', body_path)
+            os.replace(meta_path + '.tmp', meta_path)
+            self._total_bytes += len(data) - old_size
+
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def touch(self, url):
+        """Restart the TTL of an entry the server confirmed unchanged (HTTP 304)"""
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            meta['stored_at'] = time.time()
+            with open(meta_path + '.tmp', 'w') as f:
+                json.dump(meta, f)
+            os.replace(meta_path + '.tmp', meta_path)
+        except (OSError, ValueError):
+            pass
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = sorted(self._scan(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            for body_path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                for path in (body_path, body_path[:-len('.html.gz')] + '.json'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+            self._total_bytes = total
+
+    def clear(self):
+        with self._lock:
+            for body_path, _, _ in list(self._scan()):
+                for path in (body_path, body_path[:-len('.html.gz')] + '.json'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self._total_bytes = 0
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from scraper import scrape_all_pages, verify_login
+from results_parser import result_column_order
 import time
 import os
 
@@ -72,7 +73,7 @@ def show_quarterly_screener():
     with col1:
         fetch_mode = st.radio(
             "Fetch Mode",
-            ["All Pages (1-80)", "Custom Pages"],
+            ["All Pages", "Custom Pages"],
             horizontal=True,
             key="screener_fetch_mode"
         )
@@ -128,8 +129,9 @@ def show_quarterly_screener():
             status_text = st.empty()
             
             # Parse pages
-            if fetch_mode == "All Pages (1-80)":
-                pages_to_fetch = list(range(1, 81))
+            if fetch_mode == "All Pages":
+                # Planned from page 1's pagination
+                pages_to_fetch = None
             else:
                 try:
                     pages_to_fetch = []
@@ -152,15 +154,17 @@ def show_quarterly_screener():
             
             try:
                 with st.spinner("Fetching data from Screener.in..."):
+                    run_stats = {}
                     df = scrape_all_pages(
                         pages_list=pages_to_fetch, 
                         progress_callback=update_progress,
                         num_workers=num_workers,
-                        delay=delay
+                        delay=delay,
+                        run_stats=run_stats
                     )
                     st.session_state.screener_data = df
                     progress_bar.progress(1.0)
-                    status_text.text(f"✅ Successfully fetched {len(df)} companies from {len(pages_to_fetch)} pages!")
+                    status_text.text(f"✅ Successfully fetched {len(df)} companies from {len(run_stats.get('planned_pages', []))} pages!")
                     time.sleep(1)
                     st.rerun()
             except Exception as e:
@@ -273,15 +277,7 @@ def show_quarterly_screener():
         st.markdown("---")
         st.subheader(f"📋 Results ({len(filtered_df)} companies)")
         
-        column_order = [
-            'Company', 'Price', 'Market_Cap', 'PE',
-            'Sales_YOY', 'Sales_Dec25', 'Sales_Sep25', 'Sales_Dec24',
-            'EBIDT_YOY', 'EBIDT_Dec25', 'EBIDT_Sep25', 'EBIDT_Dec24',
-            'NetProfit_YOY', 'NetProfit_Dec25', 'NetProfit_Sep25', 'NetProfit_Dec24',
-            'EPS_YOY', 'EPS_Dec25', 'EPS_Sep25', 'EPS_Dec24'
-        ]
-        
-        column_order = [col for col in column_order if col in filtered_df.columns]
+        column_order = result_column_order(filtered_df.columns)
         display_df = filtered_df[column_order]
         
         st.dataframe(
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import os
+import time
+from threading import Condition, Lock
+
+class TokenBucket:
+    """
+    Global request-rate limiter shared by every fetcher in a run
+
+    Args:
+        rate: Tokens added per second (i.e. requests per second)
+        capacity: Maximum burst size. Defaults to 1 so the rate is never exceeded,
+            even right after an idle period.
+    """
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(max(1, capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = Lock()
+
+    def _reserve(self):
+        """Take one token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Going negative books the token in advance, so waiters are served in order
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a token is available"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a token is available"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+RATE_STATE_FILE = 'screener_rate_state.json'
+
+# Request outcomes reported to AdaptiveRateController.release()
+HEALTHY = 'ok'
+THROTTLE_SIGNALS = ('empty', 'login', 'throttled', 'server_error')
+
+class AdaptiveRateController:
+    """
+    AIMD (additive increase, multiplicative decrease) control of request rate
+
+    Two knobs are tuned from response signals: how many requests may be in
+    flight, and the minimum gap between request starts. Every `window` healthy
+    responses add one to concurrency and take `gap_step` off the gap. A sign of
+    throttling (empty page where results were expected, login redirect, HTTP
+    429/5xx, or latency well above the running baseline) multiplies concurrency by `decrease` and divides the
+    gap by it. The tuned values are saved so the next run starts from them.
+
+    Args:
+        min_concurrency / max_concurrency: Bounds for requests in flight
+        min_gap / max_gap: Bounds in seconds for the gap between request starts
+        window: Healthy responses needed before each additive increase
+        gap_step: Seconds taken off the gap on each increase
+        decrease: Multiplicative factor (0-1) applied on throttling
+        slow_factor: Latency above baseline * slow_factor counts as throttling
+        state_file: JSON file the tuned rate is loaded from and saved to (None to disable)
+    """
+    def __init__(self, min_concurrency=1, max_concurrency=3, min_gap=0.5, max_gap=30.0,
+                 window=5, gap_step=0.25, decrease=0.5, slow_factor=3.0, state_file=RATE_STATE_FILE):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(max_concurrency, min_concurrency)
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        self.window = window
+        self.gap_step = gap_step
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.state_file = state_file
+
+        # Start cautiously; a saved state from an earlier run overrides this
+        self.concurrency = min_concurrency
+        self.gap = min(max_gap, max(min_gap, 3.0))
+        self.latency = None  # EWMA of healthy-response latency, seconds
+        self.healthy_streak = 0
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.history = []  # (time, concurrency, gap) after each adjustment
+        self._cond = Condition(Lock())
+        self.load()
+
+    def acquire(self):
+        """Block until a request may start under the current concurrency and gap"""
+        with self._cond:
+            while self.in_flight >= self.concurrency:
+                self._cond.wait()
+            self.in_flight += 1
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.gap
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, outcome, latency=None):
+        """Report how a request went and adapt the rate"""
+        with self._cond:
+            self.in_flight -= 1
+            slow = (
+                outcome == HEALTHY and latency is not None and self.latency is not None
+                and latency > self.latency * self.slow_factor
+            )
+
+            if outcome in THROTTLE_SIGNALS or slow:
+                self.healthy_streak = 0
+                self.concurrency = max(self.min_concurrency, int(self.concurrency * self.decrease))
+                self.gap = min(self.max_gap, self.gap / self.decrease)
+                self._record(f"throttling ({'slow' if slow else outcome})")
+            elif outcome == HEALTHY:
+                if latency is not None:
+                    self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                self.healthy_streak += 1
+                if self.healthy_streak >= self.window:
+                    self.healthy_streak = 0
+                    before = (self.concurrency, self.gap)
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self.gap = max(self.min_gap, self.gap - self.gap_step)
+                    if (self.concurrency, self.gap) != before:
+                        self._record("healthy")
+            self._cond.notify_all()
+
+    def backoff_time(self):
+        """How long a worker should pause after a failed request"""
+        with self._cond:
+            return min(self.max_gap, self.gap * 2)
+
+    def _record(self, reason):
+        self.history.append((time.time(), self.concurrency, self.gap))
+        print(f"⚖️ Rate control ({reason}): concurrency {self.concurrency}, gap {self.gap:.2f}s")
+
+    def load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+            self.concurrency = min(self.max_concurrency, max(self.min_concurrency, int(state['concurrency'])))
+            self.gap = min(self.max_gap, max(self.min_gap, float(state['gap'])))
+            print(f"⚖️ Resuming tuned rate: concurrency {self.concurrency}, gap {self.gap:.2f}s")
+        except Exception as e:
+            print(f"Could not read {self.state_file}: {e}")
+
+    def save(self):
+        if not self.state_file:
+            return
+        with self._cond:
+            state = {'concurrency': self.concurrency, 'gap': self.gap}
+        with open(self.state_file, 'w') as f:
+            json.dump(state, f)
@@ -0,0 +1,376 @@
+"""
+Parsers for the Screener.in results listing (/results/latest/)
+
+Each company on the page is a header link (`a.font-weight-500`), a metrics
+block (`div.font-size-14` with Price / M.Cap / PE) and a `table.data-table`
+holding the Sales, EBIDT, Net Profit and EPS rows. The table header names the
+quarters ("Dec 2025", "Sep 2025", ...), and record keys are derived from it
+(`Sales_Dec25`), so nothing here changes when a new quarter is reported.
+Each record also keeps its header link's href (`Link`, the company's own
+page), so company pages can be crawled without reading the listing again.
+"""
+
+from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+import pandas as pd
+import json
+import re
+
+METRIC_ROWS = ['Sales', 'EBIDT', 'NetProfit', 'EPS']
+
+# Company-level values, as of the quarter the result was announced for
+SNAPSHOT_COLUMNS = ['Price', 'Market_Cap', 'PE']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+def quarter_suffix(label):
+    """Column suffix for a header label: 'Dec 2025' -> 'Dec25'"""
+    match = re.match(r'\s*([A-Za-z]{3})[A-Za-z]*\.?\s+\d{0,2}(\d{2})\s*$', label)
+    if match:
+        return match.group(1).title() + match.group(2)
+    return re.sub(r'\W+', '', label)
+
+def quarter_label(suffix):
+    """Inverse of quarter_suffix: 'Dec25' -> 'Dec 2025'"""
+    match = re.match(r'([A-Za-z]{3})(\d{2})$', suffix)
+    return f"{match.group(1)} 20{match.group(2)}" if match else suffix
+
+def quarter_ordinal(label):
+    """Months since year 0 for a 'Dec 2025' label, for sorting and arithmetic; None if unrecognised"""
+    match = re.match(r'\s*([A-Za-z]{3})[A-Za-z]*\.?\s+(\d{4})\s*$', str(label))
+    if not match or match.group(1).title() not in MONTHS:
+        return None
+    return int(match.group(2)) * 12 + MONTHS.index(match.group(1).title())
+
+def quarter_from_ordinal(ordinal):
+    """Inverse of quarter_ordinal"""
+    return f"{MONTHS[ordinal % 12]} {ordinal // 12}"
+
+def result_column_order(columns):
+    """
+    Display order for a wide result frame's columns
+
+    Company, result quarter and snapshot values first, then for each metric its
+    YOY change followed by its quarter columns, newest first.
+    """
+    columns = list(columns)
+    ordered = [col for col in ['Company', 'Quarter'] + SNAPSHOT_COLUMNS if col in columns]
+    for metric in METRIC_ROWS:
+        if f'{metric}_YOY' in columns:
+            ordered.append(f'{metric}_YOY')
+        quarter_columns = [
+            col for col in columns
+            if col.startswith(f'{metric}_') and col != f'{metric}_YOY'
+            and quarter_ordinal(quarter_label(col[len(metric) + 1:])) is not None
+        ]
+        ordered.extend(sorted(quarter_columns, key=lambda col: -quarter_ordinal(quarter_label(col[len(metric) + 1:]))))
+    return ordered + [col for col in columns if col not in ordered]
+
+def parse_value(value_str):
+    if not value_str or value_str.strip() == '' or value_str == 'None':
+        return None
+    try:
+        cleaned = value_str.replace('₹', '').replace(',', '').strip()
+        return float(cleaned)
+    except:
+        return None
+
+def parse_yoy(yoy_str):
+    if not yoy_str:
+        return None
+    match = re.search(r'([⇡⇣])\s*(\d+)%', yoy_str)
+    if match:
+        direction, value = match.groups()
+        return float(value) if direction == '⇡' else -float(value)
+    return None
+
+def build_company_record(company, metric_spans, row_cells, quarters=(), link=None):
+    """
+    Build one company record from the raw text pulled out of the page
+
+    Args:
+        company: Company name, or None if no header link precedes the table
+        metric_spans: List of (span_text, strong_text) from the metrics block
+        row_cells: List of td texts for each tbody row
+        quarters: Header labels of the value columns, newest first ("Dec 2025", ...)
+        link: href of the company header link ("/company/TCS/consolidated/"), or None
+
+    Returns None if the table has fewer than 4 rows.
+    """
+    company_data = {}
+
+    if company is not None:
+        company_data['Company'] = company
+    if link:
+        company_data['Link'] = link
+    if quarters:
+        company_data['Quarter'] = quarters[0]
+
+    for text, value in metric_spans:
+        if 'Price' in text:
+            company_data['Price'] = parse_value(value)
+        elif 'M.Cap' in text:
+            company_data['Market_Cap'] = parse_value(value)
+        elif 'PE' in text:
+            company_data['PE'] = parse_value(value)
+
+    if len(row_cells) < 4:
+        return None
+
+    suffixes = [quarter_suffix(label) for label in quarters]
+    for metric, cells in zip(METRIC_ROWS, row_cells):
+        company_data[f'{metric}_YOY'] = parse_yoy(cells[1])
+        for position, suffix in enumerate(suffixes, start=2):
+            company_data[f'{metric}_{suffix}'] = parse_value(cells[position]) if len(cells) > position else None
+
+    return company_data
+
+def parse_results_bs4(html):
+    """
+    Reference parser (BeautifulSoup + html.parser)
+
+    Kept for output comparison and benchmarking. Every table searches backwards
+    through the document for its header and metrics block, so it is slow on
+    large pages.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    companies = []
+
+    for idx, table in enumerate(soup.find_all('table', class_='data-table')):
+        try:
+            company = None
+            link = None
+            prev_element = table.find_previous('a', class_='font-weight-500')
+            if prev_element:
+                link = prev_element.get('href')
+                span = prev_element.find('span')
+                if span:
+                    company = span.text.strip()
+
+            metric_spans = []
+            metrics_div = table.find_previous('div', class_='font-size-14')
+            if metrics_div:
+                for span in metrics_div.find_all('span', class_='sub'):
+                    strong = span.find('span', class_='strong')
+                    if strong:
+                        metric_spans.append((span.get_text(), strong.text))
+
+            rows = table.find('tbody').find_all('tr')
+            row_cells = [[td.text for td in row.find_all('td')] for row in rows]
+            thead = table.find('thead')
+            quarters = [th.text.strip() for th in thead.find_all('th')[2:]] if thead else []
+
+            company_data = build_company_record(company, metric_spans, row_cells, quarters, link)
+            if company_data is not None:
+                companies.append(company_data)
+
+        except Exception as e:
+            print(f"Error on table {idx}: {e}")
+            continue
+
+    return companies
+
+def _has_class(element, class_name):
+    return class_name in (element.get('class') or '').split()
+
+def _company_name(header):
+    span = next(header.iterdescendants('span'), None)
+    return span.text_content().strip() if span is not None else None
+
+def _metric_spans(metrics_div):
+    metric_spans = []
+    for span in metrics_div.iterdescendants('span'):
+        if not _has_class(span, 'sub'):
+            continue
+        strong = next((s for s in span.iterdescendants('span') if _has_class(s, 'strong')), None)
+        if strong is not None:
+            metric_spans.append((span.text_content(), strong.text_content()))
+    return metric_spans
+
+def _row_cells(table):
+    tbody = next(table.iterdescendants('tbody'), None)
+    if tbody is None:
+        raise ValueError("table has no tbody")
+    return [
+        [td.text_content() for td in row.iterdescendants('td')]
+        for row in tbody.iterdescendants('tr')
+    ]
+
+def _quarter_labels(table):
+    thead = next(table.iterdescendants('thead'), None)
+    if thead is None:
+        return []
+    return [th.text_content().strip() for th in thead.iterdescendants('th')][2:]
+
+def parse_results_lxml(html):
+    """
+    Single-pass parser built on lxml
+
+    Walks the elements once in document order, remembering the most recent
+    company header and metrics block; each data table is paired with whatever
+    was seen last. That is exactly what the reference parser's find_previous()
+    calls resolve to, so the output is identical, in linear time.
+    """
+    if not html or not html.strip():
+        return []
+
+    root = lxml_html.fromstring(html)
+    companies = []
+    header = None
+    metrics_div = None
+    idx = 0
+
+    for element in root.iter('a', 'div', 'table'):
+        if element.tag == 'a':
+            if _has_class(element, 'font-weight-500'):
+                header = element
+        elif element.tag == 'div':
+            if _has_class(element, 'font-size-14'):
+                metrics_div = element
+        elif _has_class(element, 'data-table'):
+            try:
+                company = _company_name(header) if header is not None else None
+                link = header.get('href') if header is not None else None
+                metric_spans = _metric_spans(metrics_div) if metrics_div is not None else []
+                company_data = build_company_record(company, metric_spans, _row_cells(element), _quarter_labels(element), link)
+                if company_data is not None:
+                    companies.append(company_data)
+            except Exception as e:
+                print(f"Error on table {idx}: {e}")
+            idx += 1
+
+    return companies
+
+# Runs in the browser (execute_script) and returns the raw texts build_company_record
+# needs, as one JSON string: [[company, [[span, strong], ...], [[td, ...], ...], [th, ...], href], ...].
+# It pairs each table with the last header/metrics block seen, like parse_results_lxml.
+DOM_EXTRACT_SCRIPT = """
+const out = [];
+let header = null, metrics = null;
+for (const el of document.querySelectorAll('a.font-weight-500, div.font-size-14, table.data-table')) {
+    if (el.tagName === 'A') { header = el; continue; }
+    if (el.tagName === 'DIV') { metrics = el; continue; }
+    const tbody = el.querySelector('tbody');
+    if (!tbody) { out.push(null); continue; }
+    const name = header ? header.querySelector('span') : null;
+    const spans = [];
+    if (metrics) {
+        for (const span of metrics.querySelectorAll('span.sub')) {
+            const strong = span.querySelector('span.strong');
+            if (strong) spans.push([span.textContent, strong.textContent]);
+        }
+    }
+    const thead = el.querySelector('thead');
+    out.push([
+        name ? name.textContent : null,
+        spans,
+        Array.from(tbody.querySelectorAll('tr'), tr => Array.from(tr.querySelectorAll('td'), td => td.textContent)),
+        thead ? Array.from(thead.querySelectorAll('th'), th => th.textContent).slice(2) : [],
+        header ? header.getAttribute('href') : null,
+    ]);
+}
+return JSON.stringify(out);
+"""
+
+def parse_results_extracted(payload):
+    """
+    Company records from DOM_EXTRACT_SCRIPT's output (JSON string or decoded list)
+
+    Texts are stripped here rather than in the browser, so records match
+    parse_results_lxml exactly.
+    """
+    items = json.loads(payload) if isinstance(payload, (str, bytes)) else payload
+    companies = []
+    for idx, item in enumerate(items or []):
+        if item is None:
+            print(f"Error on table {idx}: table has no tbody")
+            continue
+        try:
+            company, metric_spans, row_cells, quarters, link = item
+            company_data = build_company_record(
+                company.strip() if company is not None else None,
+                [tuple(pair) for pair in metric_spans],
+                row_cells,
+                [label.strip() for label in quarters],
+                link
+            )
+            if company_data is not None:
+                companies.append(company_data)
+        except Exception as e:
+            print(f"Error on table {idx}: {e}")
+    return companies
+
+PARSERS = {
+    'lxml': parse_results_lxml,
+    'bs4': parse_results_bs4,
+}
+
+def parse_results_html(html, as_frame=False, parser='lxml'):
+    """
+    Parse a results listing page into company records
+
+    Pure function: no browser or network access, so it can be tested,
+    profiled and reused on saved pages.
+
+    Args:
+        html: Page HTML as str or bytes (bytes are decoded using the page's charset)
+        as_frame: Return a DataFrame instead of a list of dicts
+        parser: 'lxml' (default, single pass) or 'bs4' (reference)
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser '{parser}', expected one of {list(PARSERS)}")
+
+    companies = PARSERS[parser](html)
+    if as_frame:
+        return pd.DataFrame(companies)
+    return companies
+
+def parse_page_count(html):
+    """
+    Number of pages in the listing, from the pagination links (`div.pagination a.button`, href "?p=N")
+
+    Returns None if the page has no pagination (e.g. a login or error page).
+    """
+    if not html or not html.strip():
+        return None
+    root = lxml_html.fromstring(html)
+    pages = []
+    for div in root.iter('div'):
+        if not _has_class(div, 'pagination'):
+            continue
+        for link in div.iter('a'):
+            match = re.search(r'[?&]p=(\d+)', link.get('href') or '')
+            if match and _has_class(link, 'button'):
+                pages.append(int(match.group(1)))
+    return max(pages) if pages else None
+
+def parse_company_links(html):
+    """
+    [(company, href)] for every company header link (`a.font-weight-500`) on a listing page
+
+    The hrefs point at the company's own page ("/company/TCS/consolidated/"),
+    in page order and possibly repeated.
+    """
+    if not html or not html.strip():
+        return []
+    root = lxml_html.fromstring(html)
+    return [
+        (_company_name(link), link.get('href'))
+        for link in root.iter('a')
+        if _has_class(link, 'font-weight-500') and link.get('href')
+    ]
+
+def parse_results_compact(html):
+    """
+    Parse a page into (columns, rows) tuples instead of dicts
+
+    Used by the process-pool parse stage: tuples pickle much smaller than a
+    dict per company when sent back to the fetching process.
+    """
+    companies = parse_results_lxml(html)
+    columns = []
+    for company_data in companies:
+        for key in company_data:
+            if key not in columns:
+                columns.append(key)
+    rows = [tuple(company_data.get(key) for key in columns) for company_data in companies]
+    return tuple(columns), rows
@@ -0,0 +1,182 @@
+"""
+Write-ahead journal for scrape jobs (SQLite)
+
+Every page of a job has a row that is committed as soon as the page finishes:
+its records on success, or the attempt count and failure reason. A crash, a
+Streamlit rerun or a timeout therefore loses at most the pages in flight, and
+the job can be resumed by fetching only the pages that are not done.
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from threading import Lock
+from columnar import records_to_frame
+
+JOURNAL_FILE = 'screener_jobs.sqlite3'
+KEEP_JOBS = 10  # Older jobs are pruned when a new one is created
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+INCOMPLETE = 'incomplete'  # Job status when some pages are still pending or failed
+
+class ScrapeJournal:
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                created REAL NOT NULL,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                job_id TEXT NOT NULL,
+                page_num INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                records TEXT,
+                updated REAL,
+                PRIMARY KEY (job_id, page_num)
+            );
+        """)
+        self._conn.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def create_job(self, pages, options=None):
+        """Register a job and its pages; returns the new job_id"""
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, created, options, status) VALUES (?, ?, ?, ?)",
+                (job_id, now, json.dumps(options or {}), PENDING)
+            )
+            self._conn.executemany(
+                "INSERT INTO pages (job_id, page_num, status, updated) VALUES (?, ?, ?, ?)",
+                [(job_id, page_num, PENDING, now) for page_num in pages]
+            )
+            self._conn.commit()
+        self.prune()
+        return job_id
+
+    def set_pages(self, job_id, pages):
+        """
+        Update a job's page list once the real page count is known
+
+        Missing pages are added as pending; unfinished pages not in `pages` are
+        dropped (e.g. beyond the end of the listing). Finished pages are kept.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO pages (job_id, page_num, status, updated) VALUES (?, ?, ?, ?)",
+                [(job_id, page_num, PENDING, now) for page_num in pages]
+            )
+            keep = set(pages)
+            stale = [
+                page_num for (page_num,) in self._conn.execute(
+                    "SELECT page_num FROM pages WHERE job_id = ? AND status != ?", (job_id, DONE)
+                )
+                if page_num not in keep
+            ]
+            self._conn.executemany(
+                "DELETE FROM pages WHERE job_id = ? AND page_num = ?",
+                [(job_id, page_num) for page_num in stale]
+            )
+            self._conn.commit()
+
+    def record_page(self, job_id, page_num, companies):
+        self._execute(
+            "UPDATE pages SET status = ?, attempts = attempts + 1, error = NULL, records = ?, updated = ? "
+            "WHERE job_id = ? AND page_num = ?",
+            (DONE, json.dumps(companies), time.time(), job_id, page_num)
+        )
+
+    def record_failure(self, job_id, page_num, error, final=False):
+        """Count a failed attempt; `final` marks the page failed (it will be retried on resume)"""
+        self._execute(
+            "UPDATE pages SET status = ?, attempts = attempts + 1, error = ?, updated = ? "
+            "WHERE job_id = ? AND page_num = ? AND status != ?",
+            (FAILED if final else PENDING, str(error), time.time(), job_id, page_num, DONE)
+        )
+
+    def finish_job(self, job_id):
+        status = DONE if not self.pending_pages(job_id) else INCOMPLETE
+        self._execute("UPDATE jobs SET status = ? WHERE job_id = ?", (status, job_id))
+        return status
+
+    def pending_pages(self, job_id):
+        """Pages that are missing or failed"""
+        rows = self._query(
+            "SELECT page_num FROM pages WHERE job_id = ? AND status != ? ORDER BY page_num",
+            (job_id, DONE)
+        )
+        return [row[0] for row in rows]
+
+    def job_options(self, job_id):
+        rows = self._query("SELECT options FROM jobs WHERE job_id = ?", (job_id,))
+        if not rows:
+            raise KeyError(f"Unknown job {job_id}")
+        return json.loads(rows[0][0])
+
+    def job_summary(self, job_id):
+        """{'total', 'done', 'failed', 'pending', 'failures': {page_num: (attempts, error)}}"""
+        rows = self._query(
+            "SELECT page_num, status, attempts, error FROM pages WHERE job_id = ?", (job_id,)
+        )
+        summary = {'job_id': job_id, 'total': len(rows), DONE: 0, FAILED: 0, PENDING: 0, 'failures': {}}
+        for page_num, status, attempts, error in rows:
+            summary[status] += 1
+            if error:
+                summary['failures'][page_num] = (attempts, error)
+        return summary
+
+    def job_records(self, job_id):
+        """All records committed so far, in page order"""
+        rows = self._query(
+            "SELECT records FROM pages WHERE job_id = ? AND status = ? ORDER BY page_num",
+            (job_id, DONE)
+        )
+        records = []
+        for (data,) in rows:
+            records.extend(json.loads(data))
+        return records
+
+    def job_dataframe(self, job_id):
+        return records_to_frame(self.job_records(job_id))
+
+    def latest_job(self, incomplete_only=False):
+        sql = "SELECT job_id FROM jobs"
+        if incomplete_only:
+            sql += f" WHERE status != '{DONE}'"
+        rows = self._query(sql + " ORDER BY created DESC LIMIT 1")
+        return rows[0][0] if rows else None
+
+    def prune(self, keep=KEEP_JOBS):
+        with self._lock:
+            old = [row[0] for row in self._conn.execute(
+                "SELECT job_id FROM jobs ORDER BY created DESC LIMIT -1 OFFSET ?", (keep,)
+            )]
+            for job_id in old:
+                self._conn.execute("DELETE FROM pages WHERE job_id = ?", (job_id,))
+                self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
@@ -3,36 +3,52 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
 import pandas as pd
 import time
-import re
 import pickle
+import json
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+import asyncio
+import queue
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from functools import partial
+from threading import Lock, Semaphore, Thread
+from rate_limit import TokenBucket
+import driver_pool
+from results_parser import DOM_EXTRACT_SCRIPT, parse_page_count, parse_results_html, parse_results_compact, parse_results_extracted, quarter_suffix
+from scrape_journal import ScrapeJournal
+from columnar import ColumnarBuilder, LongBuilder, records_to_frame, conform_frame
+from metrics import RunMetrics, format_summary, span
+from session_manager import COOKIES_FILE, get_session_manager
 
-COOKIES_FILE = 'screener_cookies.pkl'
-progress_lock = Lock()
+SEEN_RESULTS_FILE = 'screener_seen_results.json'
+BASE_URL = "https://www.screener.in"
+RESULTS_URL = f"{BASE_URL}/results/latest/"
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+BACKENDS = ('selenium', 'http')
+PAGE_TIMEOUT = 15  # Max seconds to wait for a results page to become ready
+SETTLE_TIME = 0.5  # Table count must stay unchanged this long to count as ready
+MAX_PAGE_ATTEMPTS = 3
+ERROR_BACKOFF = 10  # Seconds a worker pauses after a failed page
+DEFAULT_PAGE_COUNT = 80  # Pages planned at a time when the pagination widget can't be read
+PARSE_QUEUE_SIZE = 8  # Fetched pages allowed to wait for a parser process
+# Subresources the lean browser never downloads: only the HTML of a results page is read
+LEAN_BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*adservice.google.*', '*facebook.net*', '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*',
+]
+_chromedriver_path = None
 
-def parse_value(value_str):
-    if not value_str or value_str.strip() == '' or value_str == 'None':
-        return None
-    try:
-        cleaned = value_str.replace('₹', '').replace(',', '').strip()
-        return float(cleaned)
-    except:
-        return None
+class LoginRequired(Exception):
+    """Raised when the site redirects a request to the login/register page"""
 
-def parse_yoy(yoy_str):
-    if not yoy_str:
-        return None
-    match = re.search(r'([⇡⇣])\s*(\d+)%', yoy_str)
-    if match:
-        direction, value = match.groups()
-        return float(value) if direction == '⇡' else -float(value)
-    return None
+class EmptyPageError(Exception):
+    """Raised for an empty page inside the listing's page count: more likely throttling than the end, so it is retried"""
 
 def save_cookies(driver):
     """Save cookies to file"""
@@ -42,42 +58,70 @@ def save_cookies(driver):
     print(f"✅ Cookies saved to {COOKIES_FILE}")
 
 def load_cookies(driver):
-    """Load cookies from file"""
-    if os.path.exists(COOKIES_FILE):
-        with open(COOKIES_FILE, 'rb') as f:
-            cookies = pickle.load(f)
-        for cookie in cookies:
-            try:
-                driver.add_cookie(cookie)
-            except:
-                pass
-        print(f"✅ Cookies loaded from {COOKIES_FILE}")
-        return True
-    return False
-
-def check_login_status(driver, force_reload=False):
+    """Give a driver the saved cookies (read once per process, see session_manager)"""
+    manager = get_session_manager()
+    if not manager.has_cookies():
+        return False
+    manager.apply(driver)
+    return True
+
+def is_login_url(url):
+    return '/register/' in url or '/login/' in url
+
+def wait_for_tables(driver, timeout=PAGE_TIMEOUT, settle=SETTLE_TIME, poll=0.2):
+    """
+    Wait until the results tables are present and their count is stable
+    
+    Returns the number of `table.data-table` elements. 0 means an empty page:
+    the document finished loading without tables (or never produced any before
+    the timeout), or the browser was redirected to login/register.
+    """
+    state = {'count': -1, 'since': time.monotonic(), 'result': 0}
+    
+    def ready(d):
+        if is_login_url(d.current_url):
+            state['result'] = 0
+            return True
+        
+        count = len(d.find_elements(By.CSS_SELECTOR, 'table.data-table'))
+        now = time.monotonic()
+        if count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        if now - state['since'] < settle:
+            return False
+        if count > 0:
+            state['result'] = count
+            return True
+        # No tables and nothing more to load: the page is genuinely empty
+        return d.execute_script("return document.readyState") == "complete"
+    
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll).until(ready)
+    except TimeoutException:
+        print(f"Timed out after {timeout}s waiting for tables on {driver.current_url}")
+        return max(state['count'], 0)
+    
+    return state['result']
+
+def check_login_status(driver, force_reload=False, timeout=PAGE_TIMEOUT):
     """Check if user is logged in by visiting the results page"""
     if force_reload or 'screener.in' not in driver.current_url:
-        driver.get("https://www.screener.in/results/latest/")
-        time.sleep(3)
-    else:
-        time.sleep(1)
+        driver.get(RESULTS_URL)
     
-    if '/register/' in driver.current_url or '/login/' in driver.current_url:
+    if is_login_url(driver.current_url):
         return False
     
-    try:
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        tables = soup.find_all('table', class_='data-table')
-        if len(tables) > 0:
-            return True
-    except:
-        pass
-    
-    return False
+    return wait_for_tables(driver, timeout=timeout) > 0
 
-def get_chrome_options():
-    """Get Chrome options configured for Streamlit Cloud"""
+def get_chrome_options(lean=False):
+    """
+    Get Chrome options configured for Streamlit Cloud
+    
+    lean: Return from navigation at DOMContentLoaded ('eager') instead of after
+        every subresource has loaded, and don't decode images
+    """
     chrome_options = Options()
     
     # Essential headless flags
@@ -91,25 +135,42 @@ def get_chrome_options():
     # Additional stability flags
     chrome_options.add_argument('--disable-blink-features=AutomationControlled')
     chrome_options.add_argument('--window-size=1920,1080')
-    chrome_options.add_argument('user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    chrome_options.add_argument(f'user-agent={USER_AGENT}')
     
     # Memory optimization
     chrome_options.add_argument('--disable-dev-shm-usage')
     chrome_options.add_argument('--single-process')
     chrome_options.add_argument('--disable-setuid-sandbox')
     
+    if lean:
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument('--disable-remote-fonts')
+    
     return chrome_options
 
-def init_driver(headless=True):
-    """Initialize driver with proper configuration for Streamlit Cloud"""
-    chrome_options = get_chrome_options()
+def apply_lean_profile(driver):
+    """Block images, stylesheets, fonts, analytics and ads for every later request (CDP)"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+    except Exception as e:
+        print(f"Could not apply lean profile: {e}")
+
+def init_driver(headless=True, lean=False):
+    """Initialize driver with proper configuration for Streamlit Cloud (lean: see get_chrome_options)"""
+    global _chromedriver_path
+    chrome_options = get_chrome_options(lean=lean)
     
     try:
-        # Try using webdriver-manager first
-        from webdriver_manager.chrome import ChromeDriverManager
-        from webdriver_manager.core.os_manager import ChromeType
+        # Try using webdriver-manager first; the resolved path is reused for later drivers
+        if _chromedriver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            from webdriver_manager.core.os_manager import ChromeType
+            
+            _chromedriver_path = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
         
-        service = Service(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install())
+        service = Service(_chromedriver_path)
         driver = webdriver.Chrome(service=service, options=chrome_options)
     except Exception as e:
         print(f"WebDriver Manager failed: {e}")
@@ -122,229 +183,1270 @@ def init_driver(headless=True):
             # Last resort: let selenium find it
             driver = webdriver.Chrome(options=chrome_options)
     
-    # Load cookies if they exist
-    driver.get("https://www.screener.in")
-    time.sleep(2)
+    if lean:
+        apply_lean_profile(driver)
+    
+    # Cookies go in through CDP, so the first navigation is already the page we want
     load_cookies(driver)
     
     return driver
 
-def verify_login():
-    """Verify if we have valid login cookies"""
-    if not os.path.exists(COOKIES_FILE):
-        return False
+def init_session(pool_size=10):
+    """Initialize a pooled HTTP session carrying the saved login cookies"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml',
+        'Referer': BASE_URL,
+    })
     
+    get_session_manager().apply(session)
+    return session
+
+def get_driver_pool(lean=False):
+    """Process-wide pool of warm, cookie-loaded Chrome drivers (lean drivers are pooled separately)"""
+    if lean:
+        return driver_pool.get_pool(partial(init_driver, lean=True), name='lean')
+    return driver_pool.get_pool(init_driver)
+
+def init_client(backend='selenium', pool_size=10, lean=False):
+    """Create the fetch client for a backend: an HTTP session, or a Chrome driver borrowed from the pool"""
+    if backend == 'http':
+        return init_session(pool_size=pool_size)
+    if backend == 'selenium':
+        return get_driver_pool(lean).acquire()
+    raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+def refresh_client(client, backend='selenium', pages=1, lean=False):
+    """Record pages served by a client; returns a replacement if a pooled driver crashed or wore out"""
+    if backend == 'selenium':
+        return get_driver_pool(lean).checkpoint(client, pages=pages)
+    return client
+
+def close_client(client, backend='selenium', lean=False):
+    """Release a client created by init_client (pooled drivers go back to the pool)"""
+    try:
+        if backend == 'http':
+            client.close()
+        else:
+            get_driver_pool(lean).release(client)
+    except Exception as e:
+        print(f"Error closing {backend} client: {e}")
+
+def check_login_http(timeout=PAGE_TIMEOUT):
+    """Check the saved login with a plain GET of the results page: True/False, or None if unclear"""
+    session = init_session(pool_size=1)
+    try:
+        response = session.get(RESULTS_URL, timeout=timeout)
+        if is_login_url(response.url):
+            return False
+        if response.ok and 'data-table' in response.text:
+            return True
+        return None
+    except requests.RequestException as e:
+        print(f"HTTP login check failed: {e}")
+        return None
+    finally:
+        session.close()
+
+def check_login_browser(lean=False):
+    """Check the saved login in headless Chrome (lean: from the lean drivers' pool)"""
     try:
-        driver = init_driver(headless=True)
-        is_logged_in = check_login_status(driver, force_reload=True)
-        driver.quit()
-        return is_logged_in
+        # The driver stays warm in the pool for the scrape that usually follows
+        driver = init_client('selenium', lean=lean)
+        try:
+            return check_login_status(driver, force_reload=True)
+        finally:
+            close_client(driver, 'selenium', lean=lean)
     except Exception as e:
         print(f"Login verification error: {e}")
         return False
 
-def scrape_page(driver, page_num, delay=5):
-    url = f"https://www.screener.in/results/latest/?p={page_num}" if page_num > 1 else "https://www.screener.in/results/latest/"
+def verify_login(force=False, lean_browser=False):
+    """
+    Verify if we have valid login cookies
+    
+    The answer is cached per process for session_manager.LOGIN_TTL (until the
+    cookie file changes). A plain HTTP request settles it in most cases; a
+    browser is only started when that is inconclusive, from the pool the
+    scrape will use (lean_browser, as passed to scrape_all_pages).
+    """
+    def check():
+        valid = check_login_http()
+        if valid is None:
+            print("HTTP login check inconclusive, checking in the browser")
+            valid = check_login_browser(lean=lean_browser)
+        return valid
+    
+    return get_session_manager().login_valid(check, force=force)
+
+def results_page_url(page_num):
+    return f"{RESULTS_URL}?p={page_num}" if page_num > 1 else RESULTS_URL
+
+def fetch_page_http(session, page_num, timeout=PAGE_TIMEOUT, cache=None, metrics=None):
+    """GET a results page directly; the listing is server-rendered so no browser is needed"""
+    return fetch_url_http(session, results_page_url(page_num), timeout=timeout, cache=cache, metrics=metrics, page=page_num)
+
+def fetch_url_http(session, url, timeout=PAGE_TIMEOUT, cache=None, metrics=None, page=None):
+    """GET a Screener page (results listing or company page), cached by URL when it has data tables"""
+    # A stale cache entry is revalidated with If-None-Match / If-Modified-Since
+    cached = cache.get(url) if cache else None
+    headers = cache.conditional_headers(cached) if cache else {}
+    
+    print(f"Fetching: {url}")
+    with span(metrics, 'fetch', page):
+        response = session.get(url, headers=headers, timeout=timeout)
+    
+    if response.status_code == 304 and cached:
+        print(f"Not modified: {url}")
+        cache.touch(url)
+        return cached['body']
+    
+    response.raise_for_status()
+    
+    if is_login_url(response.url):
+        raise LoginRequired(f"Redirected to {response.url} - cookies may be expired")
+    
+    if cache and 'data-table' in response.text:
+        cache.put(
+            url,
+            response.text,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+    
+    return response.text
+
+def page_transfer_bytes(driver):
+    """Bytes the browser transferred for the current page and its subresources (Resource Timing)"""
+    try:
+        return int(driver.execute_script(
+            "return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))"
+            ".reduce((total, entry) => total + (entry.transferSize || 0), 0)"
+        ) or 0)
+    except Exception:
+        return 0
+
+def open_results_page(driver, page_num, timeout=PAGE_TIMEOUT, metrics=None):
+    """Navigate to a results page and wait until its tables are ready"""
+    url = results_page_url(page_num)
     
     print(f"Fetching: {url}")
-    driver.get(url)
-    time.sleep(8)
+    with span(metrics, 'navigate', page_num):
+        driver.get(url)
+    with span(metrics, 'wait', page_num):
+        table_count = wait_for_tables(driver, timeout=timeout)
+    
+    if is_login_url(driver.current_url):
+        raise LoginRequired(f"Redirected to {driver.current_url} - cookies may be expired")
+    if table_count == 0:
+        print(f"Page {page_num} is empty")
+    
+    if metrics is not None:
+        metrics.count('bytes', page_transfer_bytes(driver))
+
+def fetch_page_selenium(driver, page_num, timeout=PAGE_TIMEOUT, metrics=None):
+    """Navigate to a results page and return its HTML as soon as the tables are ready"""
+    open_results_page(driver, page_num, timeout=timeout, metrics=metrics)
+    with span(metrics, 'transfer', page_num):
+        return driver.page_source
+
+def fetch_page_dom(driver, page_num, timeout=PAGE_TIMEOUT, metrics=None):
+    """
+    Navigate to a results page and return its company records, extracted in the browser
+    
+    One execute_script call returns just the texts the records are built from
+    as compact JSON, instead of the whole page_source being sent over the
+    WebDriver connection and parsed again in Python.
+    """
+    open_results_page(driver, page_num, timeout=timeout, metrics=metrics)
+    with span(metrics, 'extract', page_num):
+        payload = driver.execute_script(DOM_EXTRACT_SCRIPT)
+    with span(metrics, 'parse', page_num):
+        return parse_results_extracted(payload)
+
+def fetch_page_source(client, page_num, backend='selenium', timeout=PAGE_TIMEOUT, cache=None, metrics=None):
+    """Fetch the raw HTML of a results page with the given backend"""
+    if backend == 'http':
+        return fetch_page_http(client, page_num, timeout=timeout, cache=cache, metrics=metrics)
     
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
-    companies = []
+    html = fetch_page_selenium(client, page_num, timeout=timeout, metrics=metrics)
+    if cache and 'data-table' in html:
+        cache.put(results_page_url(page_num), html)
+    return html
+
+def classify_error(error):
+    """Map a fetch exception to a rate-control outcome"""
+    if isinstance(error, LoginRequired):
+        return 'login'
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        if error.response.status_code == 429:
+            return 'throttled'
+        if error.response.status_code >= 500:
+            return 'server_error'
+    return 'error'
+
+def cached_page(cache, page_num, metrics=None):
+    """Fresh cached HTML for a results page, or None"""
+    if not cache:
+        return None
+    with span(metrics, 'cache', page_num):
+        html = cache.get_fresh(results_page_url(page_num))
+    if html is not None:
+        print(f"Cache hit: page {page_num}")
+    return html
+
+def rate_controlled(fetch, rate_controller=None, is_empty=None, metrics=None, page_num=None):
+    """
+    Call fetch() once the rate controller allows it and report how it went
     
-    tables = soup.find_all('table', class_='data-table')
-    print(f"Found {len(tables)} tables")
+    The outcome (latency, empty page per is_empty(result), login redirect,
+    HTTP 429/5xx) is fed back to the controller.
+    """
+    if rate_controller is None:
+        return fetch()
     
-    if len(tables) == 0:
-        print(f"NO TABLES FOUND on page {page_num}")
+    with span(metrics, 'throttle', page_num):
+        rate_controller.acquire()
+    started = time.monotonic()
+    outcome = 'error'
+    try:
+        result = fetch()
+        outcome = 'empty' if is_empty and is_empty(result) else 'ok'
+        return result
+    except Exception as e:
+        outcome = classify_error(e)
+        raise
+    finally:
+        rate_controller.release(outcome, time.monotonic() - started)
+
+def is_empty_page(html):
+    """No results table: past the end of the listing (or a throttled response)"""
+    return 'data-table' not in html
+
+def empty_is_throttled(page_num, page_count):
+    """Whether an empty page is a throttling sign: only inside a known page count, not past the end of the listing"""
+    return page_count is not None and page_num <= page_count
+
+def load_page(client, page_num, backend='selenium', timeout=PAGE_TIMEOUT, cache=None, rate_controller=None, metrics=None, page_count=None):
+    """
+    Return (html, from_cache) for a results page, serving fresh cache entries without a request
+    
+    With a rate_controller, the request waits for its turn and its outcome
+    (latency, empty page, login redirect, HTTP 429/5xx) is reported back.
+    metrics: Optional WorkerMetrics timing each phase of the fetch
+    page_count: Pages in the listing, if known. An empty page is only reported
+        as throttling inside it; past the end of the listing it is expected.
+    """
+    html = cached_page(cache, page_num, metrics)
+    if html is not None:
+        return html, True
+    
+    html = rate_controlled(
+        lambda: fetch_page_source(client, page_num, backend=backend, timeout=timeout, cache=cache, metrics=metrics),
+        rate_controller,
+        lambda html: is_empty_page(html) and empty_is_throttled(page_num, page_count),
+        metrics,
+        page_num
+    )
+    return html, False
+
+def load_page_records(client, page_num, backend='selenium', timeout=PAGE_TIMEOUT, cache=None, rate_controller=None, metrics=None, dom_extract=False, page_count=None):
+    """
+    Return (companies, from_cache) for a results page (page_count: see load_page)
+    
+    dom_extract: With the selenium backend, build the records from data
+        extracted in the browser (fetch_page_dom). No HTML comes back, so such
+        pages are not written to the cache, but fresh cache entries are still used.
+    """
+    if not (dom_extract and backend == 'selenium'):
+        html, from_cache = load_page(client, page_num, backend=backend, timeout=timeout, cache=cache, rate_controller=rate_controller, metrics=metrics, page_count=page_count)
+        with span(metrics, 'parse', page_num):
+            return parse_results_html(html), from_cache
+    
+    html = cached_page(cache, page_num, metrics)
+    if html is not None:
+        with span(metrics, 'parse', page_num):
+            return parse_results_html(html), True
+    
+    companies = rate_controlled(
+        lambda: fetch_page_dom(client, page_num, timeout=timeout, metrics=metrics),
+        rate_controller,
+        lambda companies: not companies and empty_is_throttled(page_num, page_count),
+        metrics,
+        page_num
+    )
+    return companies, False
+
+def discover_pages(client, backend='selenium', timeout=PAGE_TIMEOUT, cache=None, rate_controller=None, metrics=None):
+    """
+    Fetch page 1 and read the number of pages from its pagination widget
+    
+    Returns (page_count, companies): page 1's records, and the page count or
+    None if the page has no pagination widget.
+    """
+    html, _ = load_page(client, 1, backend=backend, timeout=timeout, cache=cache, rate_controller=rate_controller, metrics=metrics)
+    with span(metrics, 'parse', 1):
+        companies = parse_results_html(html)
+    return parse_page_count(html), companies
+
+def scrape_page(client, page_num, delay=5, backend='selenium', timeout=PAGE_TIMEOUT, cache=None, rate_controller=None, metrics=None, dom_extract=False, page_count=None):
+    companies, from_cache = load_page_records(client, page_num, backend=backend, timeout=timeout, cache=cache, rate_controller=rate_controller, metrics=metrics, dom_extract=dom_extract, page_count=page_count)
+    
+    if len(companies) == 0:
+        print(f"NO COMPANIES FOUND on page {page_num}")
         return []
     
-    for idx, table in enumerate(tables):
+    print(f"Parsed {len(companies)} companies")
+    # No request was made, so there is nothing to be polite about
+    if not from_cache:
+        with span(metrics, 'sleep', page_num):
+            time.sleep(delay)
+    return companies
+
+class PageWorkQueue:
+    """
+    Shared queue of pages that workers pull from
+    
+    Idle workers simply take the next page, so a slow or stalled worker only
+    delays the page it is on. A failed page goes back on the queue marked with
+    the workers that failed it, and is handed to a different worker while one
+    is available. Once the end of the listing is known (end_at), pages beyond
+    it are dropped instead of being handed out.
+    """
+    def __init__(self, pages, max_attempts=MAX_PAGE_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.outstanding = 0
+        self.active_workers = set()
+        self.failed_pages = {}
+        self.skipped_pages = []
+        self.last_page = None
+        self.page_count = None  # Pages in the listing, once read from page 1
+        self.cancelled = False
+        self.login_expired = False
+        self._queue = queue.Queue()
+        self._lock = Lock()
+        self.add(pages)
+    
+    def add(self, pages):
+        with self._lock:
+            self.outstanding += len(pages)
+        for page_num in pages:
+            self._queue.put((page_num, 0, frozenset()))
+    
+    def end_at(self, page_num):
+        """Mark page_num as the last page; later pages still queued are skipped"""
+        with self._lock:
+            if self.last_page is None or page_num < self.last_page:
+                self.last_page = page_num
+    
+    def done(self):
+        return self.outstanding == 0 or self.cancelled
+    
+    def cancel(self):
+        """Stop handing out pages; workers finish the page they are on and exit"""
+        self.cancelled = True
+    
+    def register(self, worker_id):
+        with self._lock:
+            self.active_workers.add(worker_id)
+    
+    def unregister(self, worker_id):
+        with self._lock:
+            self.active_workers.discard(worker_id)
+    
+    def next_page(self, worker_id, poll=0.2):
+        """Return the next (page_num, attempt, failed_by) for this worker, or None when all pages are finished"""
+        while not self.done():
+            try:
+                item = self._queue.get(timeout=poll)
+            except queue.Empty:
+                continue
+            
+            with self._lock:
+                if self.last_page is not None and item[0] > self.last_page:
+                    self.skipped_pages.append(item[0])
+                    self.outstanding -= 1
+                    continue
+                others = self.active_workers - item[2] - {worker_id}
+            if worker_id in item[2] and others:
+                # Leave it for a worker that hasn't failed on it yet
+                self._queue.put(item)
+                time.sleep(poll)
+                continue
+            return item
+        return None
+    
+    def requeue(self, item):
+        """Put a page back as it was, without counting an attempt (e.g. after the login was refreshed)"""
+        self._queue.put(item)
+    
+    def mark_failed(self, page_num, error):
+        """Record a page that was fetched but whose content can't be trusted"""
+        with self._lock:
+            self.failed_pages[page_num] = str(error)
+    
+    def complete(self, item):
+        with self._lock:
+            self.outstanding -= 1
+    
+    def fail(self, item, worker_id, error):
+        """Re-queue a failed page for another worker; returns False once it is out of attempts"""
+        page_num, attempt, failed_by = item
+        if attempt + 1 < self.max_attempts and not isinstance(error, LoginRequired):
+            self._queue.put((page_num, attempt + 1, failed_by | {worker_id}))
+            return True
+        
+        with self._lock:
+            self.failed_pages[page_num] = str(error)
+            self.outstanding -= 1
+        return False
+
+def parse_timed(html):
+    """parse_results_compact in a parser process, with the time it took there (excluding queueing)"""
+    started = time.perf_counter()
+    columns, rows = parse_results_compact(html)
+    return time.perf_counter() - started, columns, rows
+
+def parse_stage(html_queue, emit, processes, stats, metrics=None, on_error=None):
+    """
+    Second pipeline stage: parse (page_num, html) items in a process pool
+    
+    Runs until it reads None from html_queue. A page that can't be parsed is
+    passed to on_error(page_num, error); it was fetched, so it isn't retried. At most two pages per process
+    are in flight, so a full pool stops draining the queue and the bounded
+    queue in turn blocks the fetch workers.
+    """
+    in_flight = Semaphore(processes * 2)
+    counts_lock = Lock()
+    counts = {'pages': 0, 'companies': 0}
+    started = time.monotonic()
+    
+    def store(page_num, future):
+        try:
+            seconds, columns, rows = future.result()
+            if metrics is not None:
+                metrics.record('parse', seconds, 'parser', page_num)
+            emit(page_num, [dict(zip(columns, row)) for row in rows])
+            with counts_lock:
+                counts['pages'] += 1
+                counts['companies'] += len(rows)
+            print(f"Parsed {len(rows)} companies from page {page_num}")
+        except Exception as e:
+            print(f"Parse failed for page {page_num}: {e}")
+            if on_error:
+                on_error(page_num, e)
+        finally:
+            in_flight.release()
+    
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        while True:
+            item = html_queue.get()
+            if item is None:
+                break
+            page_num, html = item
+            in_flight.acquire()
+            future = executor.submit(parse_timed, html)
+            future.add_done_callback(partial(store, page_num))
+    
+    elapsed = time.monotonic() - started
+    stats.update({
+        'processes': processes,
+        'pages': counts['pages'],
+        'companies': counts['companies'],
+        'pages_per_sec': counts['pages'] / elapsed if elapsed else 0.0,
+        'companies_per_sec': counts['companies'] / elapsed if elapsed else 0.0,
+    })
+
+def worker_scrape_pages(worker_id, work_queue, emit, delay, progress_callback=None, backend='selenium', client=None, page_timeout=PAGE_TIMEOUT, cache=None, html_queue=None, rate_controller=None, failure_callback=None, metrics=None, lean_browser=False, dom_extract=False):
+    """
+    Worker function: pull pages from the shared queue until it is drained
+    
+    Each page's records are passed to emit(page_num, companies). With an
+    html_queue the worker only fetches, handing raw HTML to the parse stage.
+    Every failed attempt is reported to failure_callback(page_num, error, final),
+    where final means the page won't be retried. An empty page inside the
+    listing's page count is such a failure (EmptyPageError), retried with backoff. With a RunMetrics, every phase
+    of every page is timed and pages, errors and retries are counted.
+    A login redirect retries the page if newer cookies are available (every
+    client picks them up before its next page), and otherwise stops all workers.
+    Returns this worker's stats.
+    """
+    stats = {'pages': 0, 'failures': 0, 'retries': 0, 'busy_time': 0.0, 'wall_time': 0.0, 'utilisation': 0.0, 'pages_per_sec': 0.0}
+    started = time.monotonic()
+    metrics = metrics.for_worker(worker_id) if metrics is not None else None
+    sessions = get_session_manager()
+    
+    owns_client = client is None
+    if owns_client:
+        with span(metrics, 'acquire'):
+            client = init_client(backend, lean=lean_browser)
+    work_queue.register(worker_id)
+    
+    def renew(client, page_num):
+        """The pooled driver to use next; None if its replacement couldn't be started"""
+        try:
+            with span(metrics, 'acquire', page_num):
+                return refresh_client(client, backend, lean=lean_browser)
+        except Exception as e:
+            # A client error: the page's own outcome is already settled
+            print(f"[Worker {worker_id}] Could not replace the browser: {e}")
+            if metrics:
+                metrics.count('errors')
+            return None
+    
+    try:
+        while True:
+            item = work_queue.next_page(worker_id)
+            if item is None:
+                break
+            page_num, attempt, _ = item
+            if attempt:
+                stats['retries'] += 1
+                if metrics:
+                    metrics.count('retries')
+            
+            busy_start = time.monotonic()
+            finished = True
+            backoff = False
+            try:
+                if client is None:
+                    # The last replacement failed to start; try again for this page
+                    with span(metrics, 'acquire', page_num):
+                        client = init_client(backend, lean=lean_browser)
+                print(f"[Worker {worker_id}] Page {page_num}" + (f" (retry {attempt})" if attempt else ""))
+                sessions.sync(client)
+                throttled = EmptyPageError(f"Empty page inside the {work_queue.page_count}-page listing (throttled?)")
+                if html_queue is None:
+                    companies = scrape_page(client, page_num, delay=delay, backend=backend, timeout=page_timeout, cache=cache, rate_controller=rate_controller, metrics=metrics, dom_extract=dom_extract, page_count=work_queue.page_count)
+                    if not companies and empty_is_throttled(page_num, work_queue.page_count):
+                        raise throttled
+                    emit(page_num, companies)
+                else:
+                    html, from_cache = load_page(client, page_num, backend=backend, timeout=page_timeout, cache=cache, rate_controller=rate_controller, metrics=metrics, page_count=work_queue.page_count)
+                    if is_empty_page(html) and empty_is_throttled(page_num, work_queue.page_count):
+                        raise throttled
+                    if is_empty_page(html):
+                        # Stop handing out later pages now rather than once the parse stage gets here
+                        work_queue.end_at(page_num)
+                    # Blocks while the parse stage is saturated (backpressure)
+                    with span(metrics, 'handoff', page_num):
+                        html_queue.put((page_num, html))
+                    if not from_cache:
+                        with span(metrics, 'sleep', page_num):
+                            time.sleep(delay)
+                stats['pages'] += 1
+                if metrics:
+                    metrics.count('pages')
+                work_queue.complete(item)
+                
+            except Exception as e:
+                print(f"[Worker {worker_id}] Error on page {page_num}: {e}")
+                stats['failures'] += 1
+                if metrics:
+                    metrics.count('errors')
+                if isinstance(e, LoginRequired) and sessions.handle_expiry(client):
+                    work_queue.requeue(item)
+                    if failure_callback:
+                        failure_callback(page_num, e, False)
+                    finished = False
+                else:
+                    if isinstance(e, LoginRequired):
+                        # Every other page would be redirected too
+                        print(f"[Worker {worker_id}] Login expired, stopping all workers")
+                        work_queue.login_expired = True
+                        work_queue.cancel()
+                    retried = work_queue.fail(item, worker_id, e)
+                    if failure_callback:
+                        failure_callback(page_num, e, not retried)
+                    backoff = retried
+                    finished = not retried
+            
+            # Outside the page's try: the page is settled, whatever happens to the client
+            if owns_client and client is not None:
+                client = renew(client, page_num)
+            if backoff:
+                # Back off this worker only; the others keep draining the queue
+                with span(metrics, 'backoff', page_num):
+                    time.sleep(rate_controller.backoff_time() if rate_controller else ERROR_BACKOFF)
+            
+            stats['busy_time'] += time.monotonic() - busy_start
+            
+            if finished and progress_callback:
+                progress_callback(1)
+    finally:
+        work_queue.unregister(worker_id)
+        if owns_client and client is not None:
+            close_client(client, backend, lean=lean_browser)
+    
+    stats['wall_time'] = time.monotonic() - started
+    stats['utilisation'] = stats['busy_time'] / stats['wall_time'] if stats['wall_time'] else 0.0
+    stats['pages_per_sec'] = stats['pages'] / stats['wall_time'] if stats['wall_time'] else 0.0
+    if metrics:
+        metrics.finished(stats['wall_time'])
+    return stats
+
+def iter_scrape_pages(pages_list=None, progress_callback=None, num_workers=1, delay=5, backend='selenium', page_timeout=PAGE_TIMEOUT, cache=None, run_stats=None, parse_processes=0, parse_queue_size=PARSE_QUEUE_SIZE, rate_controller=None, failure_callback=None, metrics_sinks=(), lean_browser=False, dom_extract=False, plan_callback=None):
+    """
+    Scrape pages with parallel workers, yielding each page as soon as it is parsed
+    
+    Yields (page_num, companies) in completion order. Pages that fail on every
+    attempt are not yielded; they are listed in run_stats['failed_pages'].
+    progress_callback, failure_callback(page_num, error, final) and
+    plan_callback(pages) are called from the consuming thread, between yields.
+    plan_callback receives the full list of planned pages whenever it changes:
+    once page 1 has given the page count, and when an empty page ends the listing.
+    Closing the generator early cancels the pages that haven't started.
+    
+    Args: see scrape_all_pages
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    
+    discover = pages_list is None
+    if discover:
+        pages_list = []
+    
+    if dom_extract and backend == 'selenium' and parse_processes > 0:
+        # Records are built from the extracted data as it arrives; there is no HTML to parse
+        print("DOM extraction: parser processes not needed")
+        parse_processes = 0
+    
+    if rate_controller is not None:
+        # One worker per allowed slot; the controller decides how many actually run and how fast
+        num_workers = rate_controller.max_concurrency
+        delay = 0
+    
+    total_pages = DEFAULT_PAGE_COUNT if discover else len(pages_list)
+    num_workers = max(1, min(num_workers, total_pages))
+    work_queue = PageWorkQueue(pages_list)
+    metrics = RunMetrics(metrics_sinks)
+    # Workers and the parse stage report here; only the consumer thread touches callers' code
+    events = queue.Queue()
+    outcome = {}
+    # count: pages in the listing per its pagination widget; end: first empty page;
+    # open_ended: the count is unknown, so more pages are planned while the last one is full
+    # empty: pages that came back empty inside that count
+    plan = {'pages': list(pages_list), 'count': None, 'end': None, 'open_ended': False, 'empty': []}
+    plan_lock = Lock()
+    
+    def end_listing(page_num):
+        """
+        An empty page: later pages are beyond the end of the listing and are not fetched
+        
+        Returns True if the page is inside the page count read from page 1, where
+        it is more likely throttling than the end of the listing (such pages only
+        get here once their retries are used up).
+        """
+        with plan_lock:
+            early = empty_is_throttled(page_num, plan['count'])
+            if early:
+                plan['empty'].append(page_num)
+            if plan['end'] is not None and plan['end'] <= page_num:
+                return early
+            plan['end'] = page_num
+            plan['open_ended'] = False
+            # Inside the advertised range an empty page may be throttling rather than the end,
+            # so the plan is kept and the skipped pages stay outstanding in the journal
+            if not early:
+                plan['pages'] = [p for p in plan['pages'] if p <= page_num]
+            pages = list(plan['pages'])
+        work_queue.end_at(page_num)
+        if early:
+            print(f"⚠️ Page {page_num} is still empty after its retries but the listing has {plan['count']} pages "
+                  f"(throttled?): skipping the rest, resume to retry them")
+        else:
+            print(f"📄 Page {page_num} is empty: end of the listing, later pages skipped")
+            events.put(('plan', pages))
+        return early
+    
+    def extend_plan(page_num):
+        """The last planned page was full and the page count is unknown: plan another batch"""
+        with plan_lock:
+            if not plan['open_ended'] or page_num != plan['pages'][-1]:
+                return
+            more = list(range(page_num + 1, page_num + DEFAULT_PAGE_COUNT + 1))
+            plan['pages'].extend(more)
+            pages = list(plan['pages'])
+        work_queue.add(more)
+        print(f"📄 Page {page_num} is full: planning pages {more[0]}-{more[-1]}")
+        events.put(('plan', pages))
+    
+    def emit(page_num, companies):
+        if companies:
+            extend_plan(page_num)
+        elif end_listing(page_num):
+            # Parsed empty although the page didn't look empty when fetched, so it wasn't retried.
+            # Not a finished page: it is reported failed so the journal keeps it for a resume
+            error = f"Empty page inside the {plan['count']}-page listing (throttled?)"
+            work_queue.mark_failed(page_num, error)
+            report_failure(page_num, error, True)
+            return
+        events.put(('page', page_num, companies))
+    
+    def update_progress(increment):
+        events.put(('progress', increment))
+    
+    def report_failure(page_num, error, final):
+        events.put(('failure', page_num, str(error), final))
+    
+    def worker_failure(page_num, error, final):
+        if final and isinstance(error, EmptyPageError):
+            # Still empty after every retry: treat it as the end for this run, keeping the plan for a resume
+            end_listing(page_num)
+        report_failure(page_num, error, final)
+    
+    def parse_failed(page_num, error):
+        # The fetch already completed the page, so it is failed here, like a page out of attempts
+        work_queue.mark_failed(page_num, error)
+        report_failure(page_num, f"Parse failed: {error}", True)
+    
+    def plan_from_first_page(client):
+        """Fetch page 1, plan the job from its page count and queue the remaining pages"""
+        planner = metrics.for_worker('planner')
+        page_count = first_page = None
+        try:
+            page_count, first_page = discover_pages(client, backend=backend, timeout=page_timeout, cache=cache, rate_controller=rate_controller, metrics=planner)
+            planner.count('pages')
+        except Exception as e:
+            # Page 1 goes to the workers like any other page, with their retries and login handling
+            print(f"Could not read the page count from page 1: {e}")
+            planner.count('errors')
+            report_failure(1, e, False)
+        
+        open_ended = False
+        if page_count is not None:
+            planned = list(range(1, page_count + 1))
+            print(f"📄 Pagination: {page_count} page(s)")
+        elif first_page == []:
+            planned = [1]
+        else:
+            planned = list(range(1, DEFAULT_PAGE_COUNT + 1))
+            open_ended = True
+            print(f"⚠️ Page count unknown: planning {DEFAULT_PAGE_COUNT} pages at a time until an empty page")
+        with plan_lock:
+            plan.update(pages=planned, count=page_count, open_ended=open_ended)
+        work_queue.page_count = page_count
+        events.put(('plan', list(planned)))
+        
+        if first_page is None:
+            work_queue.add(planned)
+        else:
+            emit(1, first_page)
+            update_progress(1)
+            work_queue.add(planned[1:])
+    
+    def run():
+        started = time.monotonic()
+        worker_stats = {}
+        parse_stats = {}
+        html_queue = None
+        shared_client = None
+        
         try:
-            company_data = {}
+            # The HTTP session is thread-safe for GETs, so workers share one connection pool;
+            # Chrome workers each borrow a warm driver from the process-wide pool
+            if backend == 'http':
+                shared_client = init_session(pool_size=num_workers)
+            else:
+                get_driver_pool(lean_browser).ensure_capacity(num_workers)
             
-            prev_element = table.find_previous('a', class_='font-weight-500')
-            if prev_element:
-                span = prev_element.find('span')
-                if span:
-                    company_data['Company'] = span.text.strip()
-                    print(f"  {idx+1}. {company_data['Company']}")
+            if discover:
+                client = shared_client
+                if client is None:
+                    with metrics.span('acquire', 'planner'):
+                        client = init_client(backend, lean=lean_browser)
+                try:
+                    plan_from_first_page(client)
+                finally:
+                    if shared_client is None:
+                        close_client(client, backend, lean=lean_browser)
             
-            metrics_div = table.find_previous('div', class_='font-size-14')
-            if metrics_div:
-                spans = metrics_div.find_all('span', class_='sub')
-                for span in spans:
-                    text = span.get_text()
-                    strong = span.find('span', class_='strong')
-                    if strong:
-                        if 'Price' in text:
-                            company_data['Price'] = parse_value(strong.text)
-                        elif 'M.Cap' in text:
-                            company_data['Market_Cap'] = parse_value(strong.text)
-                        elif 'PE' in text:
-                            company_data['PE'] = parse_value(strong.text)
+            workers = max(1, min(num_workers, work_queue.outstanding))
+            print(f"\n🚀 Starting {workers} worker(s) on {work_queue.outstanding} pages...")
             
-            rows = table.find('tbody').find_all('tr')
-            if len(rows) < 4:
-                continue
+            if parse_processes > 0:
+                html_queue = queue.Queue(maxsize=parse_queue_size)
+                parse_thread = Thread(target=parse_stage, args=(html_queue, emit, parse_processes, parse_stats, metrics, parse_failed), daemon=True)
+                parse_thread.start()
+                print(f"🧩 Parsing in {parse_processes} process(es), queue size {parse_queue_size}")
             
-            # Sales
-            cells = rows[0].find_all('td')
-            company_data['Sales_YOY'] = parse_yoy(cells[1].text)
-            company_data['Sales_Dec25'] = parse_value(cells[2].text)
-            company_data['Sales_Sep25'] = parse_value(cells[3].text)
-            company_data['Sales_Dec24'] = parse_value(cells[4].text) if len(cells) > 4 else None
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(
+                            worker_scrape_pages,
+                            worker_id,
+                            work_queue,
+                            emit,
+                            delay,
+                            progress_callback=update_progress,
+                            backend=backend,
+                            client=shared_client,
+                            page_timeout=page_timeout,
+                            cache=cache,
+                            html_queue=html_queue,
+                            rate_controller=rate_controller,
+                            failure_callback=worker_failure,
+                            metrics=metrics,
+                            lean_browser=lean_browser,
+                            dom_extract=dom_extract
+                        ): worker_id
+                        for worker_id in range(1, workers + 1)
+                        if work_queue.outstanding
+                    }
+                    
+                    worker_errors = []
+                    for future in as_completed(futures):
+                        worker_id = futures[future]
+                        try:
+                            worker_stats[worker_id] = future.result()
+                        except Exception as e:
+                            print(f"Worker {worker_id} failed: {e}")
+                            worker_errors.append(e)
+                
+                if worker_errors and not worker_stats:
+                    # No worker got to its first page (e.g. no Chrome driver could be started)
+                    raise worker_errors[0]
+            finally:
+                fetch_elapsed = time.monotonic() - started
+                if shared_client is not None:
+                    close_client(shared_client, backend)
+                if html_queue is not None:
+                    html_queue.put(None)
+                    parse_thread.join()
             
-            # EBIDT
-            cells = rows[1].find_all('td')
-            company_data['EBIDT_YOY'] = parse_yoy(cells[1].text)
-            company_data['EBIDT_Dec25'] = parse_value(cells[2].text)
-            company_data['EBIDT_Sep25'] = parse_value(cells[3].text)
-            company_data['EBIDT_Dec24'] = parse_value(cells[4].text) if len(cells) > 4 else None
+            elapsed = time.monotonic() - started
+            timings = metrics.close()
+            for worker_id, stats in worker_stats.items():
+                stats['bytes'] = timings['workers'].get(worker_id, {}).get('bytes', 0)
+            for worker_id, stats in sorted(worker_stats.items()):
+                print(f"Worker {worker_id}: {stats['pages']} pages ({stats['pages_per_sec']:.2f}/s), "
+                      f"{stats['failures']} failures, {stats['retries']} retries, {stats['utilisation']:.0%} busy")
+            if timings['phases']:
+                print("Time by phase:\n" + format_summary(timings))
+            if work_queue.failed_pages:
+                print(f"⚠️ Failed pages: {sorted(work_queue.failed_pages)}")
+            if work_queue.login_expired:
+                print("🔑 Stopped early: login expired. Save fresh cookies and resume the job.")
+            if work_queue.skipped_pages and plan['empty']:
+                print(f"⚠️ Skipped {len(work_queue.skipped_pages)} page(s) after page {plan['empty'][0]} stayed empty "
+                      f"inside the {plan['count']}-page listing (throttled?). Resume the job to fetch them")
+            elif work_queue.skipped_pages:
+                print(f"📄 Skipped {len(work_queue.skipped_pages)} page(s) after the end of the listing")
             
-            # Net Profit
-            cells = rows[2].find_all('td')
-            company_data['NetProfit_YOY'] = parse_yoy(cells[1].text)
-            company_data['NetProfit_Dec25'] = parse_value(cells[2].text)
-            company_data['NetProfit_Sep25'] = parse_value(cells[3].text)
-            company_data['NetProfit_Dec24'] = parse_value(cells[4].text) if len(cells) > 4 else None
+            if parse_stats:
+                fetched = sum(stats['pages'] for stats in worker_stats.values())
+                parse_stats['fetch_pages_per_sec'] = fetched / fetch_elapsed if fetch_elapsed else 0.0
+                print(f"Fetch stage: {parse_stats['fetch_pages_per_sec']:.2f} pages/s | "
+                      f"Parse stage: {parse_stats['pages_per_sec']:.2f} pages/s, {parse_stats['companies_per_sec']:.0f} companies/s")
             
-            # EPS
-            cells = rows[3].find_all('td')
-            company_data['EPS_YOY'] = parse_yoy(cells[1].text)
-            company_data['EPS_Dec25'] = parse_value(cells[2].text)
-            company_data['EPS_Sep25'] = parse_value(cells[3].text)
-            company_data['EPS_Dec24'] = parse_value(cells[4].text) if len(cells) > 4 else None
+            if run_stats is not None:
+                run_stats.update({
+                    'elapsed': elapsed,
+                    'workers': worker_stats,
+                    'failed_pages': dict(work_queue.failed_pages),
+                    'phases': timings['phases'],
+                    'login_expired': work_queue.login_expired,
+                    'planned_pages': list(plan['pages']),
+                    'page_count': plan['count'],
+                    'skipped_pages': sorted(work_queue.skipped_pages),
+                    # The listing was cut short: the first of these ended the run early
+                    'empty_pages': sorted(plan['empty']),
+                })
+                if parse_stats:
+                    run_stats['pipeline'] = parse_stats
             
-            companies.append(company_data)
+            if rate_controller is not None:
+                rate_controller.save()
+                if run_stats is not None:
+                    run_stats['rate'] = {'concurrency': rate_controller.concurrency, 'gap': rate_controller.gap}
             
+            print(f"\n✅ All workers completed in {elapsed:.1f}s")
         except Exception as e:
-            print(f"Error on table {idx}: {e}")
-            continue
+            outcome['error'] = e
+        finally:
+            metrics.close()
+            events.put(None)
     
-    print(f"Parsed {len(companies)} companies")
-    time.sleep(delay)
-    return companies
-
-def worker_scrape_pages(worker_id, pages_to_scrape, delay, progress_callback=None, total_pages=0):
-    """Worker function to scrape assigned pages"""
-    driver = init_driver(headless=True)
-    worker_data = []
+    Thread(target=run, daemon=True).start()
+    completed_pages = 0
     
     try:
-        for idx, page_num in enumerate(pages_to_scrape, 1):
-            try:
-                print(f"[Worker {worker_id}] Page {page_num}")
-                companies = scrape_page(driver, page_num, delay=delay)
-                worker_data.extend(companies)
-                
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            if event[0] == 'progress':
+                completed_pages += event[1]
                 if progress_callback:
-                    with progress_lock:
-                        progress_callback(1, total_pages)
-                    
-            except Exception as e:
-                print(f"[Worker {worker_id}] Error on page {page_num}: {e}")
-                time.sleep(10)
-                continue
+                    # Pages already in flight when the end was found may still report in
+                    progress_callback(min(completed_pages, total_pages), total_pages)
+            elif event[0] == 'plan':
+                total_pages = len(event[1])
+                if plan_callback:
+                    plan_callback(event[1])
+            elif event[0] == 'failure':
+                if failure_callback:
+                    failure_callback(*event[1:])
+            else:
+                yield event[1], event[2]
     finally:
-        driver.quit()
+        work_queue.cancel()
     
-    return worker_data
+    if 'error' in outcome:
+        raise outcome['error']
 
-def scrape_all_pages(pages_list=None, progress_callback=None, num_workers=1, delay=5):
+def scrape_all_pages(pages_list=None, progress_callback=None, num_workers=1, delay=5, backend='selenium', page_timeout=PAGE_TIMEOUT, cache=None, run_stats=None, parse_processes=0, parse_queue_size=PARSE_QUEUE_SIZE, rate_controller=None, layout='wide', metrics_sinks=(), lean_browser=False, dom_extract=False):
     """
     Scrape pages with parallel workers
     
     Args:
-        pages_list: List of page numbers to scrape
-        progress_callback: Callback function(completed, total)
+        pages_list: List of page numbers to scrape. None (default) scrapes the
+            whole listing: page 1 is fetched first and the rest are planned
+            from its pagination widget. Either way, the first empty page ends
+            the listing and later pages are not fetched.
+        progress_callback: Callback function(completed, total); total follows
+            the plan as the page count becomes known
         num_workers: Number of parallel workers (1-5 recommended)
         delay: Delay in seconds between page requests
+        backend: 'selenium' (headless Chrome) or 'http' (pooled requests session
+            using the saved cookies, no browser)
+        page_timeout: Max seconds to wait for each page's tables to appear
+        cache: Optional PageCache consulted before every fetch
+        run_stats: Optional dict, filled with per-worker stats, failed pages,
+            time per page phase and (when parsing in processes) per-stage throughput.
+            'empty_pages' lists pages that were empty although page 1 advertised
+            more; the run stopped there, so the data is truncated
+            (they are also in 'failed_pages')
+        parse_processes: If > 0, workers only fetch and pages are parsed in a
+            process pool of this size, so parsing doesn't compete for the GIL
+        parse_queue_size: Max fetched pages waiting to be parsed before workers block
+        rate_controller: Optional AdaptiveRateController. Replaces num_workers and
+            delay: it tunes concurrency and request spacing from response signals
+        layout: 'wide' (one row per company, columns named after the quarters
+            in the page header) or 'long' (Company, Metric, Quarter, Value, Record rows)
+        metrics_sinks: metrics.MetricsSink instances (JsonLinesSink,
+            PrometheusSink) receiving every timing span and the run summary
+        lean_browser: With the selenium backend, use Chrome drivers that block
+            images, CSS, fonts, analytics and ads and stop loading at
+            DOMContentLoaded; only the page HTML is needed
+        dom_extract: With the selenium backend, extract the records in the
+            browser with one script call per page instead of transferring and
+            parsing page_source (parse_processes is then ignored)
     """
+    if layout not in ('wide', 'long'):
+        raise ValueError(f"Unknown layout '{layout}', expected 'wide' or 'long'")
+    
+    page_data = dict(iter_scrape_pages(
+        pages_list=pages_list,
+        progress_callback=progress_callback,
+        num_workers=num_workers,
+        delay=delay,
+        backend=backend,
+        page_timeout=page_timeout,
+        cache=cache,
+        run_stats=run_stats,
+        parse_processes=parse_processes,
+        parse_queue_size=parse_queue_size,
+        rate_controller=rate_controller,
+        metrics_sinks=metrics_sinks,
+        lean_browser=lean_browser,
+        dom_extract=dom_extract
+    ))
+    
+    builder = LongBuilder() if layout == 'long' else ColumnarBuilder()
+    companies = 0
+    for page_num in pages_list or sorted(page_data):
+        records = page_data.pop(page_num, [])
+        companies += len(records)
+        builder.extend(records)
+    
+    print(f"Total companies: {companies}")
+    return builder.to_frame()
+
+# scrape_all_pages options saved with a job so resume_job can reuse them
+JOB_OPTIONS = ('num_workers', 'delay', 'backend', 'page_timeout', 'parse_processes', 'parse_queue_size', 'lean_browser', 'dom_extract')
+
+def create_job(journal, pages_list=None, **kwargs):
+    """
+    Register a journaled scrape job; kwargs are scrape_all_pages options
+    
+    With pages_list None the job is planned from page 1 when it runs; until
+    then it provisionally holds DEFAULT_PAGE_COUNT pages, so a job interrupted
+    before planning still has pages to resume.
+    """
+    options = {key: value for key, value in kwargs.items() if key in JOB_OPTIONS}
     if pages_list is None:
-        pages_list = list(range(1, 81))
+        job_id = journal.create_job(range(1, DEFAULT_PAGE_COUNT + 1), options)
+        print(f"📒 Job {job_id}: pages planned from page 1")
+    else:
+        job_id = journal.create_job(pages_list, options)
+        print(f"📒 Job {job_id}: {len(pages_list)} pages")
+    return job_id
+
+def iter_scrape_job(journal, job_id, pages_list, **kwargs):
+    """
+    iter_scrape_pages, committing each page to the job's journal as it finishes
     
-    total_pages = len(pages_list)
+    Successful pages are stored with their records; failed attempts are counted
+    with the error, so an interrupted job can be resumed with resume_job. The
+    job's pages follow the plan (page count from page 1, end of the listing).
+    """
+    def record_failure(page_num, error, final):
+        journal.record_failure(job_id, page_num, error, final)
     
-    if num_workers == 1:
-        driver = init_driver()
-        all_data = []
-        
-        try:
-            for idx, page_num in enumerate(pages_list, 1):
-                try:
-                    print(f"\nPage {page_num} ({idx}/{total_pages})")
-                    companies = scrape_page(driver, page_num, delay=delay)
-                    all_data.extend(companies)
-                    
-                    if progress_callback:
-                        progress_callback(idx, total_pages)
-                        
-                except Exception as e:
-                    print(f"Error on page {page_num}: {e}")
-                    time.sleep(10)
-                    continue
-        finally:
-            driver.quit()
-        
-        return pd.DataFrame(all_data)
+    def record_plan(pages):
+        journal.set_pages(job_id, pages)
+    
+    try:
+        for page_num, companies in iter_scrape_pages(pages_list, failure_callback=record_failure, plan_callback=record_plan, **kwargs):
+            journal.record_page(job_id, page_num, companies)
+            yield page_num, companies
+    finally:
+        summary = journal.job_summary(job_id)
+        status = journal.finish_job(job_id)
+        print(f"📒 Job {job_id} {status}: {summary['done']}/{summary['total']} pages done")
+
+def scrape_job(pages_list=None, journal=None, **kwargs):
+    """
+    scrape_all_pages as a resumable, journaled job
     
+    Returns (job_id, DataFrame of every page committed so far).
+    """
+    journal = journal or ScrapeJournal()
+    job_id = create_job(journal, pages_list, **kwargs)
+    for _ in iter_scrape_job(journal, job_id, pages_list, **kwargs):
+        pass
+    return job_id, journal.job_dataframe(job_id)
+
+def resume_job(job_id, journal=None, **kwargs):
+    """
+    Fetch only the pages of a job that are missing or failed
+    
+    The job's saved options are reused unless overridden by kwargs. Returns a
+    DataFrame of the whole job, in page order.
+    """
+    journal = journal or ScrapeJournal()
+    options = {**journal.job_options(job_id), **kwargs}
+    pages = journal.pending_pages(job_id)
+    
+    if pages:
+        print(f"📒 Resuming job {job_id}: {len(pages)} page(s) left")
+        for _ in iter_scrape_job(journal, job_id, pages, **options):
+            pass
     else:
-        print(f"\n🚀 Starting {num_workers} parallel workers...")
-        
-        chunk_size = max(1, len(pages_list) // num_workers)
-        remainder = len(pages_list) % num_workers
-        
-        worker_pages = []
-        start_idx = 0
-        
-        for i in range(num_workers):
-            current_chunk_size = chunk_size + (1 if i < remainder else 0)
-            end_idx = start_idx + current_chunk_size
+        print(f"📒 Job {job_id} already complete")
+    return journal.job_dataframe(job_id)
+
+def _key_value(value):
+    """Format a metric for result_key the same whether it came from a fresh record or a float32 frame"""
+    if value is None or value != value:  # None or NaN
+        return None
+    return round(float(value), 2)
+
+def result_key(record):
+    """Identify a company's announced result; a new quarter for the same company gets a new key"""
+    suffix = quarter_suffix(record.get('Quarter') or '')
+    return f"{record.get('Company')}|{_key_value(record.get(f'Sales_{suffix}'))}|{_key_value(record.get(f'NetProfit_{suffix}'))}"
+
+def load_seen_keys(path=SEEN_RESULTS_FILE):
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return set(json.load(f))
+        except Exception as e:
+            print(f"Could not read {path}: {e}")
+    return set()
+
+def save_seen_keys(keys, path=SEEN_RESULTS_FILE):
+    with open(path, 'w') as f:
+        json.dump(sorted(keys), f)
+
+def scrape_new_results(existing_df=None, progress_callback=None, delay=5, backend='selenium', max_pages=80, seen_file=SEEN_RESULTS_FILE, lean_browser=False, dom_extract=False):
+    """
+    Incremental scrape: fetch only results announced since the previous run
+    
+    /results/latest/ lists the newest results first, so pages are fetched in
+    order and the walk stops at the first page whose results are all known.
+    
+    Args:
+        existing_df: Dataset from earlier runs to merge the new rows into. Without
+            one there is nothing to merge into, so every page is fetched.
+        progress_callback: Callback function(completed, total); total is max_pages
+            since the stopping page isn't known up front
+        delay: Delay in seconds between page requests
+        backend: 'selenium' or 'http'
+        max_pages: Upper bound on pages to walk
+        seen_file: JSON file remembering the result keys seen so far
+        lean_browser: Use the lean Chrome profile (see scrape_all_pages)
+        dom_extract: Extract records in the browser (see scrape_all_pages)
+    
+    Returns:
+        (merged_df, new_df): the updated dataset and just the new rows
+    """
+    has_existing = existing_df is not None and len(existing_df) > 0
+    seen = set()
+    if has_existing:
+        seen = load_seen_keys(seen_file)
+        seen.update(result_key(record) for record in existing_df.to_dict('records'))
+    
+    client = init_client(backend, lean=lean_browser)
+    new_records = []
+    
+    try:
+        for page_num in range(1, max_pages + 1):
+            try:
+                print(f"\nPage {page_num} (incremental)")
+                companies = scrape_page(client, page_num, delay=delay, backend=backend, dom_extract=dom_extract)
+            except Exception as e:
+                print(f"Error on page {page_num}: {e}")
+                break
             
-            if start_idx < len(pages_list):
-                worker_pages.append(pages_list[start_idx:end_idx])
-            else:
-                worker_pages.append([])
+            if progress_callback:
+                progress_callback(page_num, max_pages)
             
-            start_idx = end_idx
-        
-        for i, pages in enumerate(worker_pages, 1):
-            if pages:
-                print(f"Worker {i}: {len(pages)} pages - {pages[:5]}{'...' if len(pages) > 5 else ''}")
-        
-        all_data = []
-        completed_pages = [0]
+            if not companies:
+                break
+            
+            fresh = [c for c in companies if result_key(c) not in seen]
+            print(f"{len(fresh)} new results on page {page_num}")
+            if not fresh:
+                break
+            
+            new_records.extend(fresh)
+            seen.update(result_key(c) for c in fresh)
+    finally:
+        close_client(client, backend, lean=lean_browser)
+    
+    save_seen_keys(seen, seen_file)
+    new_df = records_to_frame(new_records)
+    
+    if not has_existing:
+        return new_df, new_df
+    if new_df.empty:
+        return existing_df, new_df
+    
+    # A company's newer result replaces its older row
+    older = existing_df[~existing_df['Company'].isin(new_df['Company'])] if 'Company' in new_df.columns else existing_df
+    merged_df = conform_frame(pd.concat([new_df, older], ignore_index=True))
+    
+    print(f"\n✅ Incremental scrape: {len(new_df)} new results, {len(merged_df)} total")
+    return merged_df, new_df
+
+async def async_scrape_all_pages(pages_list=None, progress_callback=None, requests_per_second=2.0, max_in_flight=8, retries=1, cache=None):
+    """
+    Scrape pages concurrently over HTTP under one global rate limit
+    
+    Unlike scrape_all_pages, the total request rate does not grow with concurrency:
+    every fetch (including retries) takes a token from a single shared bucket.
+    
+    Args:
+        pages_list: List of page numbers to scrape; None plans the whole listing
+            from page 1's pagination widget (without one, DEFAULT_PAGE_COUNT
+            pages at a time while the last planned page is full). Pages after
+            the first empty one are not fetched; inside the page count an
+            empty page is retried first, as it may be throttling.
+        progress_callback: Callback function(completed, total)
+        requests_per_second: Global request rate across all in-flight fetches
+        max_in_flight: Maximum number of requests outstanding at once
+        retries: Extra attempts per page after a failed fetch
+        cache: Optional PageCache; fresh hits skip the rate limiter entirely
+    """
+    bucket = TokenBucket(requests_per_second)
+    in_flight = asyncio.Semaphore(max_in_flight)
+    session = init_session(pool_size=max_in_flight)
+    page_data = {}
+    completed_pages = [0]
+    end = [None]  # First empty page
+    page_count = None
+    open_ended = [False]  # The count is unknown: more pages are planned while the last one is full
+    
+    if pages_list is None:
+        try:
+            await bucket.acquire_async()
+            page_count, page_data[1] = await asyncio.to_thread(discover_pages, session, 'http', PAGE_TIMEOUT, cache)
+        except Exception as e:
+            print(f"Could not read the page count from page 1: {e}")
+        pages_list = list(range(1, (page_count or DEFAULT_PAGE_COUNT) + 1))
+        if page_data.get(1) == []:
+            end[0] = 1
+        open_ended[0] = page_count is None and end[0] is None
+    else:
+        pages_list = list(pages_list)
+    
+    tasks = []
+    
+    def page_done(page_num, companies):
+        page_data[page_num] = companies
+        if not companies and (end[0] is None or page_num < end[0]):
+            end[0] = page_num
+            open_ended[0] = False
+        elif companies and open_ended[0] and page_num == pages_list[-1]:
+            more = list(range(page_num + 1, page_num + DEFAULT_PAGE_COUNT + 1))
+            print(f"📄 Page {page_num} is full: planning pages {more[0]}-{more[-1]}")
+            pages_list.extend(more)
+            tasks.extend(asyncio.ensure_future(fetch(p)) for p in more)
+    
+    def report_progress():
+        completed_pages[0] += 1
+        if progress_callback:
+            progress_callback(min(completed_pages[0], len(pages_list)), len(pages_list))
+    
+    async def fetch(page_num):
+        if page_num in page_data or (end[0] is not None and page_num > end[0]):
+            # Planned from page 1 already, or beyond the end of the listing
+            report_progress()
+            return
         
-        def update_progress(increment, total):
-            completed_pages[0] += increment
-            if progress_callback:
-                progress_callback(completed_pages[0], total)
+        if cache:
+            html = await asyncio.to_thread(cache.get_fresh, results_page_url(page_num))
+            if html is not None:
+                page_done(page_num, parse_results_html(html))
+                report_progress()
+                return
         
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            futures = []
-            for worker_id, pages in enumerate(worker_pages, 1):
-                if pages:
-                    future = executor.submit(
-                        worker_scrape_pages, 
-                        worker_id, 
-                        pages, 
-                        delay,
-                        update_progress,
-                        total_pages
-                    )
-                    futures.append(future)
-            
-            for future in as_completed(futures):
-                try:
-                    worker_data = future.result()
-                    all_data.extend(worker_data)
-                except Exception as e:
-                    print(f"Worker failed: {e}")
+        for attempt in range(retries + 1):
+            try:
+                async with in_flight:
+                    if end[0] is not None and page_num > end[0]:
+                        break
+                    # Take the token only once a slot is free so queued tasks can't bunch up
+                    await bucket.acquire_async()
+                    # requests is blocking; run it (and the parse) off the event loop
+                    companies = await asyncio.to_thread(scrape_page, session, page_num, 0, 'http', PAGE_TIMEOUT, cache, page_count=page_count)
+                if not companies and empty_is_throttled(page_num, page_count) and attempt < retries:
+                    raise EmptyPageError(f"Empty page inside the {page_count}-page listing (throttled?)")
+                page_done(page_num, companies)
+                break
+            except LoginRequired as e:
+                print(f"Error on page {page_num}: {e}")
+                break
+            except Exception as e:
+                print(f"Error on page {page_num} (attempt {attempt + 1}/{retries + 1}): {e}")
+                if isinstance(e, EmptyPageError):
+                    await asyncio.sleep(ERROR_BACKOFF)
         
-        print(f"\n✅ All workers completed. Total companies: {len(all_data)}")
-        return pd.DataFrame(all_data)
+        report_progress()
+    
+    print(f"\n🚀 Async scrape: {len(pages_list)} pages at {requests_per_second} req/s, max {max_in_flight} in flight")
+    try:
+        tasks.extend(asyncio.ensure_future(fetch(page_num)) for page_num in pages_list)
+        # Fetches of a full last page plan (and start) more
+        while tasks:
+            pending, tasks[:] = list(tasks), []
+            await asyncio.gather(*pending)
+    finally:
+        session.close()
+    
+    builder = ColumnarBuilder()
+    for page_num in pages_list:
+        builder.extend(page_data.pop(page_num, []))
+    
+    print(f"\n✅ Async scrape completed. Total companies: {len(builder)}")
+    return builder.to_frame()
 
 if __name__ == "__main__":
     df = scrape_all_pages(pages_list=[1])
@@ -0,0 +1,191 @@
+"""
+Process-wide login session: saved cookies, their validity and their injection
+
+The cookie file is read once and re-read only when it changes on disk. Chrome
+drivers get the cookies through CDP (Network.setCookies) before their first
+navigation, so no homepage visit is needed just to be allowed to set them, and
+HTTP sessions get them in their cookie jar. Login validity is cached for a
+while, so reruns and new app sessions don't each need a check.
+
+Each load of the cookies is a new generation. When a request is redirected to
+the login page mid-run, handle_expiry() re-reads the file: if it changed (e.g.
+fresh cookies were uploaded), every client is brought up to date on its next
+sync() and the page can be retried; if not, the login is marked invalid.
+"""
+
+import os
+import pickle
+import time
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+COOKIES_FILE = 'screener_cookies.pkl'
+COOKIE_URL = 'https://www.screener.in'
+LOGIN_TTL = 10 * 60  # Seconds a login check result is trusted
+
+def cdp_cookie(cookie):
+    """Selenium cookie dict -> CDP Network.CookieParam"""
+    param = {'name': cookie['name'], 'value': cookie['value'], 'path': cookie.get('path', '/')}
+    if cookie.get('domain'):
+        param['domain'] = cookie['domain']
+    else:
+        param['url'] = COOKIE_URL
+    for key, cdp_key in (('secure', 'secure'), ('httpOnly', 'httpOnly'), ('sameSite', 'sameSite'), ('expiry', 'expires')):
+        if cookie.get(key) is not None:
+            param[cdp_key] = cookie[key]
+    return param
+
+class SessionManager:
+    """
+    Args:
+        path: Pickled list of Selenium cookie dicts (as saved by save_cookies)
+        ttl: Seconds a login check result is trusted
+    """
+    def __init__(self, path=COOKIES_FILE, ttl=LOGIN_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.generation = 0
+        self._cookies = []
+        self._signature = None  # (mtime_ns, size) of the file the cookies came from
+        self._login = None      # (valid, checked_at, generation)
+        self._applied = WeakKeyDictionary()  # client -> generation of the cookies it holds
+        self._lock = Lock()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload_if_changed(self):
+        """Re-read the cookie file if it changed; returns True if it did (caller holds the lock)"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return False
+        cookies = []
+        if signature is not None:
+            try:
+                with open(self.path, 'rb') as f:
+                    cookies = pickle.load(f)
+                print(f"✅ Cookies loaded from {self.path}")
+            except Exception as e:
+                print(f"Could not read {self.path}: {e}")
+        self._cookies = cookies
+        self._signature = signature
+        self.generation += 1
+        self._login = None
+        return True
+
+    def cookies(self):
+        with self._lock:
+            self._reload_if_changed()
+            return list(self._cookies)
+
+    def has_cookies(self):
+        return bool(self.cookies())
+
+    def _apply(self, client):
+        """Give a driver or requests session the current cookies (caller holds the lock)"""
+        if hasattr(client, 'execute_cdp_cmd'):
+            try:
+                client.execute_cdp_cmd('Network.enable', {})
+                if self._cookies:
+                    client.execute_cdp_cmd('Network.setCookies', {'cookies': [cdp_cookie(cookie) for cookie in self._cookies]})
+            except Exception as e:
+                print(f"CDP cookie injection failed ({e}), adding cookies after a page load")
+                client.get(COOKIE_URL)
+                for cookie in self._cookies:
+                    try:
+                        client.add_cookie(cookie)
+                    except Exception:
+                        pass
+        else:
+            client.cookies.clear()
+            for cookie in self._cookies:
+                client.cookies.set(
+                    cookie['name'],
+                    cookie['value'],
+                    domain=cookie.get('domain'),
+                    path=cookie.get('path', '/')
+                )
+        self._applied[client] = self.generation
+
+    def apply(self, client):
+        """
+        Give a Chrome driver or requests session the current cookies
+
+        Drivers get them through CDP, which works before the first navigation;
+        drivers without CDP fall back to visiting the site and adding them.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            self._apply(client)
+
+    def sync(self, client):
+        """Re-apply cookies to a client holding an older generation; returns True if it did"""
+        with self._lock:
+            self._reload_if_changed()
+            if self._applied.get(client) == self.generation:
+                return False
+            self._apply(client)
+            return True
+
+    def login_valid(self, check, force=False):
+        """
+        Whether the saved cookies are logged in, calling check() at most once per ttl
+
+        check returns True/False. The cached answer is dropped when the cookie
+        file changes or handle_expiry() finds the login expired.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            if not self._cookies:
+                return False
+            login = self._login
+            if (not force and login is not None and login[2] == self.generation
+                    and time.monotonic() - login[1] < self.ttl):
+                return login[0]
+            generation = self.generation
+
+        valid = bool(check())
+        with self._lock:
+            if self.generation == generation:
+                self._login = (valid, time.monotonic(), generation)
+        return valid
+
+    def handle_expiry(self, client=None):
+        """
+        Called when a request made with client was redirected to the login page
+
+        Returns True if newer cookies than the client's are available (on disk,
+        or already loaded by another worker): clients pick them up on their
+        next sync(), so the request can be retried. Returns False if the login
+        has expired and there is nothing to refresh it with.
+        """
+        with self._lock:
+            changed = self._reload_if_changed()
+            if self._cookies and (changed or (client is not None and self._applied.get(client) != self.generation)):
+                if changed:
+                    print("🔑 Login redirect: newer cookies found, refreshing all workers")
+                return True
+            self._login = (False, time.monotonic(), self.generation)
+            print("🔑 Login redirect: saved cookies have expired")
+            return False
+
+    def login_expired(self):
+        """True once handle_expiry() found no usable cookies (until the file changes)"""
+        with self._lock:
+            self._reload_if_changed()
+            return self._login is not None and self._login[0] is False and self._login[2] == self.generation
+
+_manager = None
+_manager_lock = Lock()
+
+def get_session_manager():
+    """Return the process-wide SessionManager, creating it on first use"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionManager()
+        return _manager